@@ -0,0 +1,345 @@
+"""Shared game assets, optionally served from a packed image bundle.
+
+Build a bundle of every image under images/ with:
+
+    python assets.py images -o images/assets.bundle
+
+Images are indexed by their path relative to the current directory,
+the way the game names them, so build it from the game's directory.
+"""
+import mmap
+import os
+import queue
+import struct
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import pygame
+
+MAGIC = b'FGAB'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+
+# Pixel rows are stored as BGRA, the byte order of a 32-bit display surface
+# on little-endian hosts, and every image starts on an ALIGN boundary
+PIXEL_FORMAT = 'BGRA'
+DISPLAY_MASKS = (0xFF0000, 0xFF00, 0xFF)
+ALIGN = 64
+IMAGE_EXTENSIONS = ('.bmp', '.png', '.jpg', '.jpeg', '.gif', '.tga')
+
+# Shown in place of opaque images that are still loading
+PLACEHOLDER_COLOUR = (90, 90, 90)
+
+
+def _bundle_key(path):
+    """Return the index key for path: relative to the current directory, '/'-separated.
+
+    Keys do not depend on how the path was spelled, so images bundled
+    as $PWD/images/... are found as images/....
+    """
+    return os.path.relpath(path).replace(os.sep, '/')
+
+
+def image_size(path):
+    """Return the (width, height) in the header of a PNG or BMP file, or None."""
+    with open(path, 'rb') as f:
+        header = f.read(26)
+    if header[:8] == b'\x89PNG\r\n\x1a\n' and len(header) >= 24:
+        return struct.unpack('>II', header[16:24])
+    if header[:2] == b'BM' and len(header) >= 26:
+        width, height = struct.unpack('<ii', header[18:26])
+        return width, abs(height)
+    return None
+
+
+def build_bundle(folder, output):
+    """Pack every image under folder into the bundle file output.
+
+    Returns the number of images packed.
+    """
+    import json
+
+    index = {}
+    blobs = []
+    offset = 0
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            image = pygame.image.load(path)
+            pixels = pygame.image.tobytes(image, PIXEL_FORMAT)
+            index[_bundle_key(path)] = (offset, image.get_width(), image.get_height())
+            padding = -len(pixels) % ALIGN
+            blobs.append(pixels + bytes(padding))
+            offset += len(pixels) + padding
+
+    index_bytes = json.dumps(index).encode()
+    data_start = HEADER.size + len(index_bytes)
+    data_start += -data_start % ALIGN
+    with open(output, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        f.write(bytes(data_start - f.tell()))
+        for blob in blobs:
+            f.write(blob)
+    return len(index)
+
+
+class AssetBundle:
+    """A class to serve surfaces straight out of a memory-mapped bundle.
+
+    The file is mapped copy-on-write, so every game process on a host
+    shares the same pages and surfaces are created over them without
+    decoding or copying.
+    """
+
+    def __init__(self, path):
+        """Map the bundle at path and read its index."""
+        import json
+
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, index_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} asset bundle")
+        index = json.loads(self.map[HEADER.size:HEADER.size + index_size])
+        data_start = HEADER.size + index_size
+        data_start += -data_start % ALIGN
+        self.index = {key: (data_start + offset, width, height)
+                      for key, (offset, width, height) in index.items()}
+        self.view = memoryview(self.map)
+
+    def __contains__(self, path):
+        return _bundle_key(path) in self.index
+
+    def paths(self, folder):
+        """Return the sorted bundled image paths directly inside folder."""
+        prefix = _bundle_key(folder) + '/'
+        return sorted(os.path.join(folder, key[len(prefix):]) for key in self.index
+                      if key.startswith(prefix) and '/' not in key[len(prefix):])
+
+    def surface(self, path, alpha=False):
+        """Return a surface over the bundled pixels of path."""
+        offset, width, height = self.index[_bundle_key(path)]
+        pixels = self.view[offset:offset + width * height * 4]
+        surface = pygame.image.frombuffer(pixels, (width, height), PIXEL_FORMAT)
+        if not alpha:
+            surface.set_alpha(None)
+        return surface
+
+
+class AssetLoader:
+    """A class to decode image files on worker threads.
+
+    Decoded images come back through a queue that the main thread drains
+    with finished(), since converting them needs the display.
+    """
+
+    def __init__(self, workers):
+        """Start a pool of workers decoding threads."""
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix='assets')
+        self.done = queue.SimpleQueue()
+
+    def submit(self, key, path):
+        """Decode the image at path; it comes back tagged with key."""
+        self.pool.submit(self._decode, key, path)
+
+    def _decode(self, key, path):
+        """Worker: load path and queue the result, or the error raised."""
+        try:
+            self.done.put((key, pygame.image.load(path)))
+        except Exception as error:
+            self.done.put((key, error))
+
+    def finished(self, deadline):
+        """Yield decoded (key, surface) pairs, at least one, until deadline."""
+        while True:
+            try:
+                yield self.done.get_nowait()
+            except queue.Empty:
+                return
+            if perf_counter() >= deadline:
+                return
+
+    def close(self):
+        """Stop the workers, dropping images not yet decoded."""
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class AssetCache:
+    """A class to load, convert and share the game's images.
+
+    Images are taken from the asset bundle when one is given and holds
+    them, and loaded from the loose files otherwise. With a loader, loose
+    PNG and BMP files are decoded in the background: image() hands out a
+    placeholder of the right size at once and finalize() later copies
+    the real pixels into it, so every sprite already holding it is
+    updated.
+    """
+
+    def __init__(self, bundle_path=None, loader=None):
+        """Initialize the cache and its hit/miss counters."""
+        self.images = {}
+        self.folders = {}
+        self.masks = {}
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+        self.bundled = 0
+        self.bundle = None
+        self.loader = loader
+        self.pending = {}
+        if bundle_path and os.path.exists(bundle_path):
+            self.bundle = AssetBundle(bundle_path)
+
+    def image(self, path, alpha=False):
+        """Return the converted surface for path, loading it only once."""
+        key = (path, alpha)
+        surface = self.images.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        size = None
+        if self.bundle is not None and path in self.bundle:
+            surface = self._bundled(path, alpha)
+        elif self.loader is not None and (size := image_size(path)):
+            surface = self._placeholder(size, alpha)
+            self.pending[key] = surface
+            self.loader.submit(key, path)
+        else:
+            surface = pygame.image.load(path)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        self.images[key] = surface
+        return surface
+
+    @staticmethod
+    def _placeholder(size, alpha):
+        """Return a surface to show until an image of size has loaded."""
+        if alpha:
+            surface = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+            surface.fill((0, 0, 0, 0))
+        else:
+            surface = pygame.Surface(size).convert()
+            surface.fill(PLACEHOLDER_COLOUR)
+        return surface
+
+    def is_pending(self, path, alpha=False):
+        """Return True while path is still shown as a placeholder."""
+        return (path, alpha) in self.pending
+
+    def finalize(self, deadline):
+        """Convert decoded images into their placeholders until deadline.
+
+        At least one image is finalized per call, so loading always
+        progresses however little time is left. Returns the number of
+        images finalized.
+        """
+        if not self.pending:
+            return 0
+        count = 0
+        for key, decoded in self.loader.finished(deadline):
+            if isinstance(decoded, Exception):
+                raise decoded
+            placeholder = self.pending.pop(key)
+            alpha = key[1]
+            surface = decoded.convert_alpha() if alpha else decoded.convert()
+            placeholder.get_buffer().write(surface.get_buffer().raw)
+
+            # Masks built from the placeholder are redrawn in place too
+            mask = self.masks.get(key)
+            if mask is not None:
+                mask.clear()
+                mask.draw(pygame.mask.from_surface(placeholder), (0, 0))
+            count += 1
+        return count
+
+    def _bundled(self, path, alpha):
+        """Return the bundled surface for path, converted only if the display needs it."""
+        self.bundled += 1
+        surface = self.bundle.surface(path, alpha)
+        display = pygame.display.get_surface()
+        if display is not None and display.get_masks()[:3] != DISPLAY_MASKS:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        return surface
+
+    def mask(self, path, alpha=False):
+        """Return the collision mask for the image at path, built only once."""
+        key = (path, alpha)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.image(path, alpha))
+            self.masks[key] = mask
+        return mask
+
+    def solid_mask(self, size):
+        """Return a fully set collision mask of the given size."""
+        mask = self.masks.get(size)
+        if mask is None:
+            mask = pygame.mask.Mask(size, fill=True)
+            self.masks[size] = mask
+        return mask
+
+    def font(self, name, size):
+        """Return a shared SysFont, creating it only once."""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        return font
+
+    def folder(self, folder):
+        """Return the sorted list of image paths inside folder."""
+        paths = self.folders.get(folder)
+        if paths is None:
+            if self.bundle is not None and self.bundle.paths(folder):
+                paths = self.bundle.paths(folder)
+            else:
+                paths = sorted(os.path.join(folder, f) for f in os.listdir(folder))
+            self.folders[folder] = paths
+        return paths
+
+    def preload(self, paths=(), folders=()):
+        """Load every listed image and every image in folders up front.
+
+        Each entry in paths is a (path, alpha) pair, images found in
+        folders are loaded with per-pixel alpha. Warns when there is a
+        bundle but it holds none of them, as when it was built elsewhere.
+        """
+        wanted = []
+        for path, alpha in paths:
+            self.image(path, alpha)
+            wanted.append(path)
+        for folder in folders:
+            for path in self.folder(folder):
+                self.image(path, alpha=True)
+                wanted.append(path)
+        if self.bundle is not None and wanted and not any(path in self.bundle for path in wanted):
+            warnings.warn(f"{self.bundle.path} holds none of the game's images, which are "
+                          "loaded from their files; rebuild it from the game's directory")
+
+    def report(self):
+        """Return a short summary of the cache activity."""
+        return (f"assets: {len(self.images)} loaded ({self.bundled} from bundle, "
+                f"{len(self.pending)} pending), {self.hits} hits, {self.misses} misses")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack the game's images into a bundle.")
+    parser.add_argument('folder', nargs='?', default='images')
+    parser.add_argument('-o', '--output', default=os.path.join('images', 'assets.bundle'))
+    args = parser.parse_args(argv)
+    count = build_bundle(args.folder, args.output)
+    print(f"packed {count} images into {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,4 @@
 import random
-import os
 
 import pygame
 from pygame.sprite import Sprite
@@ -9,27 +8,153 @@ class Tree(Sprite):
 
     def __init__(self, fg_game, initial=False):
         super().__init__()
-        self.screen = fg_game.screen
         self.settings = fg_game.settings
-        self.images_folder = 'images/trees/'
-        self.images = [os.path.join(self.images_folder, f) for f in os.listdir(self.images_folder)]
+        self.assets = fg_game.assets
+        self.random = fg_game.random
+        self.images = self.assets.folder(self.settings.trees_folder)
+        self.speed = self.settings.tree_speed
+        self.reset(initial)
 
-        self.image_path = random.choice(self.images)
-        self.image = pygame.image.load(self.image_path).convert_alpha()
+    def reset(self, initial=False):
+        """Pick a new image and position for the tree."""
+        self.image_path = self.random.choice(self.images)
+        self.image = self.assets.image(self.image_path, alpha=True)
         self.rect = self.image.get_rect()
         if initial:
-            self.rect.x = random.randint(0, self.settings.screen_width)
+            self.rect.x = self.random.randint(0, self.settings.screen_width)
         else:
             self.rect.x = self.settings.screen_width
-        self.rect.y = random.randint(0, self.settings.screen_height)
+        self.rect.y = self.random.randint(0, self.settings.screen_height)
         self.x = float(self.rect.x)
-        self.speed = 1.2
 
-    def update(self):
-        """Move the tree left across the screen."""
-        self.x -= self.speed
+    def update(self, dt):
+        """Move the tree left across the screen for a step of dt seconds."""
+        self.x -= self.speed * dt
         self.rect.x = self.x
 
-    def draw_tree(self):
-        """Draw the tree to the screen."""
-        self.screen.blit(self.image, self.rect)
\ No newline at end of file
+class Terrain:
+    """A class to scroll pre-rendered strips of trees behind the game.
+
+    Trees are baked into opaque chunks as wide as
+    Settings.terrain_chunk_width, so drawing the background costs the
+    same couple of blits however many trees there are. Chunks are baked
+    the first time they are drawn, one more is kept baked beyond the
+    right edge while the game is being drawn, and chunks that scroll off
+    the left are recycled. Each chunk's trees come from a random source
+    seeded with the game seed and the chunk's number, so the background
+    never disturbs the game's random stream and looks the same however
+    late it is baked.
+
+    update() and position() only deal with the scroll position; the
+    chunks are only touched by blits() and prepare(), on the thread
+    that draws.
+    """
+
+    def __init__(self, fg_game):
+        """Set up the scroll position; nothing is baked until drawn."""
+        self.settings = fg_game.settings
+        self.assets = fg_game.assets
+        self.renderer = fg_game.renderer
+        self.seed = fg_game.seed
+        self.screen_width = fg_game.screen_rect.width
+        self.width = self.settings.terrain_chunk_width or self.screen_width
+        self.height = fg_game.screen_rect.height
+        self.speed = self.settings.tree_speed
+        self.density = self.settings.terrain_density
+        self.paths = None
+        self.images = None
+        self.stale = False
+        self.outdated = False
+
+        # Baked chunks by number, and surfaces ready to re-bake
+        self.chunks = {}
+        self.free = []
+
+        # Number of the leftmost chunk, and its left edge at this step and the last one
+        self.first = 0
+        self.x = 0.0
+        self.prev_x = 0.0
+
+    def rebuild(self):
+        """Re-bake every chunk when next drawn, after a change of density or seed."""
+        self.outdated = True
+
+    def _chunk(self, number):
+        """Return chunk number, baking it if needed."""
+        chunk = self.chunks.get(number)
+        if chunk is None:
+            chunk = self._bake(number)
+            self.chunks[number] = chunk
+        return chunk
+
+    def _bake(self, number):
+        """Return a chunk with the background colour and its trees."""
+        if self.images is None:
+            self.paths = self.assets.folder(self.settings.trees_folder)
+            self.images = [self.assets.image(path, alpha=True) for path in self.paths]
+        if any(self.assets.is_pending(path, alpha=True) for path in self.paths):
+            # Baked with placeholders, so bake again once the trees arrive
+            self.stale = True
+        if self.free:
+            chunk = self.free.pop()
+            self.renderer.forget(chunk)
+        else:
+            chunk = pygame.Surface((self.width, self.height)).convert()
+        chunk.fill(self.settings.bg_colour)
+
+        rng = random.Random(f"{self.seed}:{number}")
+        count = round(self.density * self.width / self.screen_width)
+        for _ in range(count):
+            image = rng.choice(self.images)
+            x = rng.randint(0, max(0, self.width - image.get_width()))
+            y = rng.randint(0, self.height)
+            chunk.blit(image, (x, y))
+        return chunk
+
+    def prepare(self, first=None):
+        """Bake the chunk just beyond the right edge ahead of time."""
+        if first is None:
+            first = self.first
+        self._chunk(first + -(-self.screen_width // self.width))
+
+    def update(self, dt):
+        """Scroll left for a step of dt seconds."""
+        self.prev_x = self.x
+        self.x -= self.speed * dt
+        if self.x <= -self.width:
+            self.first += 1
+            self.x += self.width
+            self.prev_x += self.width
+
+    def position(self, alpha=1.0):
+        """Return the leftmost chunk and its left edge, alpha between the last two steps."""
+        return self.first, round(self.prev_x + (self.x - self.prev_x) * alpha)
+
+    def blits(self, position):
+        """Return the (chunk, position) pairs covering the screen at position.
+
+        Chunks that have scrolled off are recycled, and then the next one
+        is streamed in at once.
+        """
+        first, x = position
+        if self.stale and not any(self.assets.is_pending(path, alpha=True)
+                                  for path in self.paths):
+            self.stale = False
+            self.outdated = True
+        if self.outdated:
+            self.outdated = False
+            self.free.extend(self.chunks.values())
+            self.chunks.clear()
+        gone = [number for number in self.chunks if number < first]
+        if gone:
+            for number in gone:
+                self.free.append(self.chunks.pop(number))
+            self.prepare(first)
+
+        sequence = []
+        number = first
+        while x < self.screen_width:
+            sequence.append((self._chunk(number), (x, 0)))
+            x += self.width
+            number += 1
+        return sequence
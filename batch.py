@@ -0,0 +1,163 @@
+"""Play many headless FighterGames in parallel with a scripted bot.
+
+Each game runs in its own worker process with its own seed, and results
+are streamed back as games finish. For example, to compare two enemy
+speeds:
+
+    python batch.py --games 2000 --set enemy_speed=240
+    python batch.py --games 2000 --set enemy_speed=300 --output results.jsonl
+"""
+import argparse
+import json
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+# Keep every worker from printing pygame's banner
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame
+
+from settings import Settings
+
+METRICS = ('score', 'lives', 'frames', 'kills')
+
+
+class Bot:
+    """A scripted player that lines up with the nearest enemy and fires."""
+
+    MOVES = {-1: pygame.K_w, 1: pygame.K_s}
+
+    def __init__(self, fire_interval=6):
+        """Initialize the bot; fire_interval is the steps between shots."""
+        self.fire_interval = fire_interval
+        self.held = None
+
+    def __call__(self, fg_game):
+        """Return the events for this step."""
+        events = []
+        plane = fg_game.plane.rect
+        target = min(fg_game.enemies, default=None,
+                     key=lambda enemy: enemy.rect.x - plane.right if enemy.rect.x > plane.right
+                     else fg_game.settings.screen_width)
+
+        # Hold up or down until the plane is level with the target
+        move = None
+        if target and abs(target.rect.centery - plane.centery) > plane.height // 4:
+            move = 1 if target.rect.centery > plane.centery else -1
+        if move != self.held:
+            if self.held is not None:
+                events.append(pygame.event.Event(pygame.KEYUP, key=self.MOVES[self.held]))
+            if move is not None:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=self.MOVES[move]))
+            self.held = move
+
+        if fg_game.frame % self.fire_interval == 0:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        return events
+
+
+def play_game(seed, overrides, max_frames):
+    """Play one headless game with the bot and return its result."""
+    from fighter_game import FighterGame
+
+    settings = Settings()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    start = perf_counter()
+    fg_game = FighterGame(headless=True, seed=seed, settings=settings)
+    fg_game.run_headless(max_frames=max_frames, script=Bot())
+    return {
+        'seed': seed,
+        'score': fg_game.score,
+        'lives': fg_game.lives,
+        'frames': fg_game.frame,
+        'kills': fg_game.kills,
+        'game_over': fg_game.game_over,
+        'startup_ms': fg_game.startup.first_frame_ms,
+        'seconds': perf_counter() - start,
+    }
+
+
+def summarize(results):
+    """Return mean, stdev, min, median and max of every metric."""
+    summary = {'games': len(results)}
+    for metric in METRICS:
+        values = [result[metric] for result in results]
+        summary[metric] = {
+            'mean': statistics.fmean(values),
+            'stdev': statistics.stdev(values) if len(values) > 1 else 0.0,
+            'min': min(values),
+            'median': statistics.median(values),
+            'max': max(values),
+        }
+    return summary
+
+
+def run_batch(games, overrides=None, seed=0, workers=None, max_frames=36000, on_result=None):
+    """Play games in a process pool and return their summary statistics.
+
+    Game i is seeded with seed + i. on_result is called with each result
+    as soon as its game finishes.
+    """
+    overrides = overrides or {}
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_game, seed + i, overrides, max_frames)
+                   for i in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return summarize(results)
+
+
+def _parse_override(text):
+    """Turn 'name=value' into a (name, value) pair, reading value as JSON."""
+    name, _, value = text.partition('=')
+    if not hasattr(Settings(), name):
+        raise argparse.ArgumentTypeError(f"unknown setting {name!r}")
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-frames', type=int, default=36000,
+                        help="simulation steps before a game is cut off")
+    parser.add_argument('--set', type=_parse_override, action='append', default=[],
+                        metavar='NAME=VALUE', help="override a Settings value")
+    parser.add_argument('--output', help="append each game's result to this JSON-lines file")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, 'a') if args.output else None
+    finished = 0
+
+    def on_result(result):
+        nonlocal finished
+        finished += 1
+        if output:
+            output.write(json.dumps(result) + '\n')
+        print(f"[{finished}/{args.games}] seed {result['seed']}: score {result['score']}, "
+              f"kills {result['kills']}, frames {result['frames']}")
+
+    start = perf_counter()
+    try:
+        summary = run_batch(args.games, dict(args.set), args.seed, args.workers,
+                            args.max_frames, on_result)
+    finally:
+        if output:
+            output.close()
+    elapsed = perf_counter() - start
+    summary['games_per_second'] = args.games / elapsed
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""Stress benchmarks for the update and render phases of FighterGame.
+
+Run with, for example:
+
+    python benchmark.py --frames 600 --output bench.json
+    python benchmark.py --compare bench.json
+
+Every scenario uses a fixed seed so results are comparable between commits.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+import pygame
+
+import snapshot
+from fighter_game import FighterGame
+
+def _populate_enemies(fg_game, count):
+    """Spawn fleets until there are count enemies, spread across the screen."""
+    while len(fg_game.enemies) < count:
+        before = set(fg_game.enemies)
+        fg_game._start_waves()
+        offset = fg_game.random.randint(0, fg_game.settings.screen_width // 2)
+        for enemy in [enemy for enemy in fg_game.enemies if enemy not in before]:
+            # Re-add the enemy so array-backed groups pick up the new position
+            fg_game.enemies.remove(enemy)
+            enemy.x -= offset
+            enemy.rect.x = enemy.x
+            fg_game.enemies.add(enemy)
+
+
+def _populate_trees(fg_game, count):
+    """Add trees until there are count of them."""
+    while len(fg_game.trees) < count:
+        fg_game.trees.add(fg_game.tree_pool.acquire(initial=True))
+
+
+def _populate_bullets(fg_game, count):
+    """Fire pooled bullets until there are count of them, spread across the screen."""
+    while len(fg_game.bullets) < count:
+        bullet = fg_game.bullet_pool.acquire(fg_game.plane)
+        bullet.x = fg_game.random.uniform(bullet.x, fg_game.settings.screen_width)
+        bullet.rect.x = bullet.x
+        fg_game.bullets.add(bullet)
+
+
+def _populate_powerups(fg_game, count):
+    """Add power-ups until there are count of them."""
+    while len(fg_game.powerups) < count:
+        fg_game.powerups.add(fg_game.powerup_pool.acquire('extra_life'))
+
+
+class Scenario:
+    """A named stress setup that keeps entity populations at fixed sizes."""
+
+    def __init__(self, name, enemies=0, trees=0, powerups=0, bullets=0):
+        self.name = name
+        self.enemies = enemies
+        self.trees = trees
+        self.powerups = powerups
+        self.bullets = bullets
+
+    def setup(self, fg_game):
+        """Configure the game before the first frame."""
+        if self.bullets:
+            fg_game.settings.bullets_allowed = self.bullets
+        # Keep the stress population alive rather than resetting on a hit
+        fg_game._plane_hit = lambda: None
+        if self.trees and fg_game.terrain:
+            # Baked trees cost nothing per frame, so only the density changes
+            fg_game.terrain.density = self.trees
+            fg_game.terrain.rebuild()
+        self.refill(fg_game)
+
+    def refill(self, fg_game):
+        """Top the populations back up; not part of the timed frame."""
+        _populate_enemies(fg_game, self.enemies)
+        _populate_bullets(fg_game, self.bullets)
+        if not fg_game.terrain:
+            _populate_trees(fg_game, self.trees)
+        _populate_powerups(fg_game, self.powerups)
+
+
+SCENARIOS = {
+    'baseline': Scenario('baseline'),
+    'fleet': Scenario('fleet', enemies=1000),
+    'bullets': Scenario('bullets', enemies=200, bullets=500),
+    'trees': Scenario('trees', trees=500),
+    'powerups': Scenario('powerups', powerups=300),
+    'mixed': Scenario('mixed', enemies=1000, trees=300, powerups=200, bullets=300),
+}
+
+
+def _percentile(samples, fraction):
+    """Return the nearest-rank percentile of sorted samples."""
+    index = min(len(samples) - 1, int(round(fraction * (len(samples) - 1))))
+    return samples[index]
+
+
+def _summarize(samples):
+    """Return mean and tail timings in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': _percentile(ordered, 0.50) * 1000,
+        'p95_ms': _percentile(ordered, 0.95) * 1000,
+        'p99_ms': _percentile(ordered, 0.99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def _time_snapshots(fg_game, repeats=200):
+    """Return the size of a world snapshot and the time to capture and restore it."""
+    captures, restores = [], []
+    for _ in range(repeats):
+        start = perf_counter()
+        data = snapshot.capture(fg_game)
+        captures.append(perf_counter() - start)
+        start = perf_counter()
+        snapshot.restore(fg_game, data)
+        restores.append(perf_counter() - start)
+    return {'bytes': len(data), 'capture': _summarize(captures),
+            'restore': _summarize(restores)}
+
+
+def run_scenario(scenario, frames, seed, render=True, render_mode=None, render_scale=None):
+    """Run one scenario and return its timing report."""
+    fg_game = FighterGame(headless=True, seed=seed)
+    if render_mode:
+        fg_game.renderer.mode = render_mode
+    # A fixed scale, so runs stay comparable
+    fg_game.settings.dynamic_resolution = False
+    if render_scale:
+        fg_game.renderer.set_scale(render_scale)
+    scenario.setup(fg_game)
+
+    steps = [
+        ('_fire_bullets', fg_game._fire_bullets if scenario.bullets else None),
+        ('plane.update', lambda: fg_game.plane.update(fg_game.dt)),
+        ('_maybe_spawn_fleet', fg_game._maybe_spawn_fleet),
+        ('_update_enemies', fg_game._update_enemies),
+        ('_update_bullets', fg_game._update_bullets),
+        ('_update_powerups', fg_game._update_powerups),
+        ('_update_trees', fg_game._update_trees),
+        ('_check_collisions', fg_game._check_collisions),
+        ('_update_screen', fg_game._update_screen if render else None),
+        ('_prepare_waves', lambda: fg_game._prepare_waves(perf_counter())),
+    ]
+    steps = [(name, step) for name, step in steps if step]
+    phase_times = {name: [] for name, _ in steps}
+    frame_times = []
+    # sys.getallocatedblocks() only gives the heap's size, so this is the
+    # net change in live blocks over a frame, not how many were allocated
+    net_blocks = []
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+
+    for _ in range(frames):
+        scenario.refill(fg_game)
+        blocks_before = sys.getallocatedblocks()
+        frame_start = perf_counter()
+        for name, step in steps:
+            start = perf_counter()
+            step()
+            phase_times[name].append(perf_counter() - start)
+        frame_times.append(perf_counter() - frame_start)
+        net_blocks.append(sys.getallocatedblocks() - blocks_before)
+        fg_game.frame += 1
+
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+    snapshots = _time_snapshots(fg_game)
+    return {
+        'frames': frames,
+        'entities': {
+            'enemies': len(fg_game.enemies),
+            'bullets': len(fg_game.bullets),
+            'powerups': len(fg_game.powerups),
+            'trees': fg_game.terrain.density if fg_game.terrain else len(fg_game.trees),
+        },
+        'render': {
+            'mode': fg_game.renderer.mode,
+            'scale': fg_game.renderer.scale,
+            'full_frames': fg_game.renderer.full_frames,
+            'dirty_frames': fg_game.renderer.dirty_frames,
+        },
+        'pools': fg_game.pool_report(),
+        'frame': _summarize(frame_times),
+        'phases': {name: _summarize(times) for name, times in phase_times.items()},
+        'heap': {
+            'net_blocks_per_frame': statistics.fmean(net_blocks),
+            'max_net_blocks': max(net_blocks),
+            'gc_collections': collections,
+        },
+        'snapshot': snapshots,
+    }
+
+
+def _git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """Print the frame-time change of every scenario present in both reports."""
+    for name, result in new['scenarios'].items():
+        previous = old['scenarios'].get(name)
+        if not previous:
+            continue
+        before = previous['frame']['p95_ms']
+        after = result['frame']['p95_ms']
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:10} p95 {before:8.3f} ms -> {after:8.3f} ms ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help="scenarios to run (default: all)")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--no-render', action='store_true',
+                        help="skip the _update_screen phase")
+    parser.add_argument('--render-mode', choices=['full', 'dirty'],
+                        help="override Settings.render_mode")
+    parser.add_argument('--render-scale', type=float,
+                        help="draw the world at this fraction of the screen size")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--compare', help="compare against an earlier JSON report")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'seed': args.seed,
+        'scenarios': {},
+    }
+    for name in args.scenarios:
+        result = run_scenario(SCENARIOS[name], args.frames, args.seed,
+                              not args.no_render, args.render_mode, args.render_scale)
+        report['scenarios'][name] = result
+        frame = result['frame']
+        snapshots = result['snapshot']
+        print(f"{name:10} p50 {frame['p50_ms']:7.3f} ms  p95 {frame['p95_ms']:7.3f} ms  "
+              f"p99 {frame['p99_ms']:7.3f} ms  snapshot {snapshots['bytes']:6} B "
+              f"capture {snapshots['capture']['p50_ms'] * 1000:6.0f} us "
+              f"restore {snapshots['restore']['p50_ms'] * 1000:6.0f} us")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
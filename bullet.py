@@ -5,23 +5,24 @@ from pygame.sprite import Sprite
 class Bullet(Sprite):
     """ A class to manage bullets fired from the plane"""
 
-    def __init__(self, fg_game):
-        """ Create a bullet at the present plane location """
+    def __init__(self, fg_game, plane=None):
+        """ Create a bullet at the present location of plane, the player's by default """
         super().__init__()
-        self.screen = fg_game.screen
         self.settings = fg_game.settings
-        self.colour = self.settings.bullet_colour
+        self.plane = plane or fg_game.plane
 
         self.rect = pygame.Rect(0, 0, self.settings.bullet_width, self.settings.bullet_height)
-        self.rect.midleft = fg_game.plane.rect.midright
+        self.mask = fg_game.assets.solid_mask(self.rect.size)
+        self.reset()
 
+    def reset(self, plane=None):
+        """ Move the bullet back to the front of its plane, or of a new one """
+        if plane is not None:
+            self.plane = plane
+        self.rect.midleft = self.plane.rect.midright
         self.x = float(self.rect.x)
 
-    def update(self):
-        """ Move the bullet """
-        self.x += self.settings.bullet_speed
+    def update(self, dt):
+        """ Move the bullet for a step of dt seconds """
+        self.x += self.settings.bullet_speed * dt
         self.rect.x = self.x
-
-    def draw_bullet(self):
-        """ Draw the bullet """
-        pygame.draw.rect(self.screen, self.colour, self.rect)
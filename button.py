@@ -1,17 +1,18 @@
-import pygame.font
+import pygame
 
 class Button:
 
     def __init__(self, fg_game, msg):
         """Initialize button attributes."""
-        self.screen = fg_game.screen
-        self.screen_rect = self.screen.get_rect()
+        self.renderer = fg_game.renderer
+        self.text = fg_game.text
+        self.screen_rect = fg_game.screen_rect
 
         # Set the dimensions and properties of the button
         self.width, self.height = 200, 50
         self.button_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
 
         # Build the button's rect object and center it
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -23,11 +24,11 @@ class Button:
 
     def _prep_msg(self, msg):
         """Turn msg into a rendered image and center text on the button."""
-        self.msg_image = self.font.render(msg, True, self.text_color, self.button_color)
+        self.msg_image = self.text.render(msg, self.font_size, self.text_color, self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
     def draw_button(self):
         # Draw blank button and then draw message
-        self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
+        self.renderer.fill(self.button_color, self.rect)
+        self.renderer.blit(self.msg_image, self.msg_image_rect)
@@ -0,0 +1,178 @@
+import pygame
+
+import entities
+
+
+class SpatialHash:
+    """A uniform grid that buckets a group's sprites by the cells they cover.
+
+    Groups backed by the NumPy entity store are bucketed in one vectorized
+    pass into a sorted array of cell keys; other groups use a dict of
+    cell lists. Groups smaller than min_size are not bucketed at all;
+    their sprites and rects are kept in group order and checked in one
+    Rect.collidelistall call.
+    """
+
+    def __init__(self, cell_size, min_size=0):
+        """Initialize an empty grid with square cells of cell_size pixels."""
+        self.cell_size = cell_size
+        self.min_size = min_size
+        self.cells = {}
+        self.keys = None
+        self.members = None
+        self.slots = None
+        self.everything = None
+        self.rects = None
+
+    def rebuild(self, group):
+        """Re-bucket every sprite in group at its current position."""
+        if len(group) < self.min_size:
+            self.everything = group.sprites()
+            self.rects = [sprite.rect for sprite in self.everything]
+            return
+        self.everything = self.rects = None
+        if isinstance(group, entities.EntityGroup):
+            self._rebuild_arrays(group)
+            return
+
+        size = self.cell_size
+        cells = {}
+        for sprite in group:
+            rect = sprite.rect
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket is None:
+                        cells[(cx, cy)] = [sprite]
+                    else:
+                        bucket.append(sprite)
+        self.cells = cells
+        self.keys = None
+
+    def _rebuild_arrays(self, group):
+        """Bucket an EntityGroup by sorting (cell key, slot) pairs."""
+        np = entities.np
+        size = self.cell_size
+        count = len(group.slots)
+        left, top = group.left(), group.top()
+        first_x, first_y = left // size, top // size
+        last_x = (group.right() - 1) // size
+        last_y = (top + group.height[:count] - 1) // size
+
+        keys, members = [], []
+        slots = np.arange(count)
+        span_x = int((last_x - first_x).max()) + 1 if count else 0
+        span_y = int((last_y - first_y).max()) + 1 if count else 0
+        for dx in range(span_x):
+            for dy in range(span_y):
+                covered = (first_x + dx <= last_x) & (first_y + dy <= last_y)
+                keys.append(self._key(first_x[covered] + dx, first_y[covered] + dy))
+                members.append(slots[covered])
+
+        if keys:
+            keys = np.concatenate(keys)
+            order = np.argsort(keys, kind='stable')
+            self.keys = keys[order]
+            self.members = np.concatenate(members)[order]
+        else:
+            self.keys = np.zeros(0, dtype=np.int64)
+            self.members = np.zeros(0, dtype=np.int64)
+        self.slots = list(group.slots)
+
+    @staticmethod
+    def _key(cx, cy):
+        """Pack cell coordinates into a single integer key."""
+        return cx * 65536 + cy
+
+    def query(self, rect):
+        """Return the sprites sharing at least one cell with rect."""
+        if self.everything is not None:
+            return self.everything
+        size = self.cell_size
+        found = set()
+        if self.keys is not None:
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                    key = self._key(cx, cy)
+                    start = self.keys.searchsorted(key, 'left')
+                    end = self.keys.searchsorted(key, 'right')
+                    if start != end:
+                        found.update(self.slots[i] for i in self.members[start:end].tolist())
+            return found
+
+        cells = self.cells
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+
+class Collisions:
+    """A class to run the game's collision checks through spatial hashes.
+
+    The results match pygame.sprite.spritecollide, spritecollideany and
+    groupcollide: hits come back in group order and sprites killed
+    earlier in the same check are skipped.
+    """
+
+    def __init__(self, fg_game):
+        """Create one grid per group that is collided against."""
+        self.settings = fg_game.settings
+        cell_size = self.settings.collision_cell_size
+        min_size = self.settings.collision_grid_min
+        self.enemies = SpatialHash(cell_size, min_size)
+        self.powerups = SpatialHash(cell_size, min_size)
+
+    def _collided(self, sprite, other):
+        """Narrow phase: rects, then masks when pixel collisions are on."""
+        if not sprite.rect.colliderect(other.rect):
+            return False
+        if self.settings.pixel_collisions:
+            return pygame.sprite.collide_mask(sprite, other) is not None
+        return True
+
+    def _hits(self, sprite, group, grid):
+        """Return the live sprites in group colliding with sprite, in group order."""
+        if grid.everything is not None:
+            # Already in group order; the rects are tested in C
+            everything = grid.everything
+            hits = [everything[i] for i in sprite.rect.collidelistall(grid.rects)]
+            if self.settings.pixel_collisions:
+                return [other for other in hits if group.has_internal(other)
+                        and pygame.sprite.collide_mask(sprite, other) is not None]
+            return [other for other in hits if group.has_internal(other)]
+        hits = [other for other in grid.query(sprite.rect)
+                if group.has_internal(other) and self._collided(sprite, other)]
+        if len(hits) > 1:
+            # Rare enough that walking the group to restore its order is cheap
+            hit_set = set(hits)
+            hits = [other for other in group if other in hit_set]
+        return hits
+
+    def spritecollide(self, sprite, group, grid, dokill):
+        """Return the sprites in group that collide with sprite."""
+        hits = self._hits(sprite, group, grid)
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+    def spritecollideany(self, sprite, group, grid):
+        """Return the first sprite in group that collides with sprite, or None."""
+        hits = self._hits(sprite, group, grid)
+        return hits[0] if hits else None
+
+    def groupcollide(self, groupa, groupb, grid, dokilla, dokillb):
+        """Return a dict mapping each sprite in groupa to the groupb sprites it hit."""
+        crashed = {}
+        if not groupb:
+            return crashed
+        for sprite in groupa.sprites():
+            hits = self.spritecollide(sprite, groupb, grid, dokillb)
+            if hits:
+                crashed[sprite] = hits
+                if dokilla:
+                    sprite.kill()
+        return crashed
@@ -1,19 +1,25 @@
-import pygame
 from pygame.sprite import Sprite
 
 class EnemyPlane(Sprite):
     """A Class to represent enemies planes"""
 
-    def __init__(self, fg_game, direction):
+    def __init__(self, fg_game, direction=1):
 
         super().__init__()
-        self.screen = fg_game.screen
+        self.screen_rect = fg_game.screen_rect
         self.settings = fg_game.settings
 
         # Load the image to be used for the plane
-        self.image = pygame.image.load('images/enemy1.bmp')
+        self.image = fg_game.assets.image(self.settings.enemy_image)
+        self.mask = fg_game.assets.mask(self.settings.enemy_image)
         self.rect = self.image.get_rect()
 
+        #set the speed of the enemy
+        self.speed = 1.0
+        self.reset(direction)
+
+    def reset(self, direction):
+        """Return the enemy to its starting state"""
         #start each new enemy near the top left of the screen
         self.rect.x = self.rect.width
         self.rect.y = self.rect.height
@@ -21,15 +27,13 @@ class EnemyPlane(Sprite):
         #store the exact postion
         self.x = float(self.rect.x)
         self.y = float(self.rect.y)
-
-        #set the speed of the enemy
-        self.speed = 1.0
         self.direction = direction
 
-    def update(self):
-        """Move the plane"""
-        self.y -= self.direction * self.settings.enemy_speed
-        self.x -= self.settings.enemy_speed
+    def update(self, dt):
+        """Move the plane for a step of dt seconds"""
+        distance = self.settings.enemy_speed * dt
+        self.y -= self.direction * distance
+        self.x -= distance
         self.rect.y = self.y
         self.rect.x = self.x
 
@@ -39,13 +43,8 @@ class EnemyPlane(Sprite):
 
     def check_edges(self):
         """Return true if an enemy is at the edge of the screen"""
-        screen_rect = self.screen.get_rect()
-        if self.rect.top <= 0 or self.rect.bottom >= screen_rect.bottom:
+        if self.rect.top <= 0 or self.rect.bottom >= self.screen_rect.bottom:
             return True
-        if self.rect.left <= 0 or self.rect.right >= screen_rect.right:
+        if self.rect.left <= 0 or self.rect.right >= self.screen_rect.right:
             return True
-        return False
-
-    def blitme(self):
-        """Draw the enemy plane at its current location."""
-        self.screen.blit(self.image, self.rect)
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -0,0 +1,160 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, groups fall back to per-sprite updates
+    np = None
+
+
+def available():
+    """Return True if the NumPy entity store can be used."""
+    return np is not None
+
+
+def _to_pixels(values):
+    """Round float positions to whole pixels the way pygame.Rect does."""
+    return np.trunc(values + np.copysign(0.5, values)).astype(np.int64)
+
+
+class EntityGroup(pygame.sprite.Group):
+    """A sprite group that keeps its sprites' motion state in NumPy arrays.
+
+    While the game is running the arrays are the source of truth for
+    positions and directions. sync() copies them back onto each sprite's
+    x, y, direction and rect so drawing and collision code keep working
+    with ordinary sprites.
+    """
+
+    _fields = (('x', 'float64'), ('y', 'float64'), ('prev_x', 'float64'),
+               ('prev_y', 'float64'), ('direction', 'int64'), ('width', 'int64'),
+               ('height', 'int64'))
+
+    def __init__(self, *sprites, track_y=False, track_direction=False, capacity=64):
+        """Create empty arrays; track_* select which sprite attributes to mirror."""
+        self.track_y = track_y
+        self.track_direction = track_direction
+        self.slots = []
+        self.index = {}
+        self._allocate(capacity)
+        super().__init__(*sprites)
+
+    def _allocate(self, capacity):
+        """Create (or grow) the arrays to hold capacity sprites."""
+        count = len(self.slots)
+        arrays = {}
+        for name, dtype in self._fields:
+            array = np.zeros(capacity, dtype=dtype)
+            if count:
+                array[:count] = getattr(self, name)[:count]
+            arrays[name] = array
+        self.__dict__.update(arrays)
+        self.capacity = capacity
+
+    def add_internal(self, sprite, layer=None):
+        """Register the sprite and copy its current state into the arrays."""
+        super().add_internal(sprite)
+        slot = len(self.slots)
+        if slot == self.capacity:
+            self._allocate(self.capacity * 2)
+        self.slots.append(sprite)
+        self.index[sprite] = slot
+        self.x[slot] = self.prev_x[slot] = sprite.x
+        self.y[slot] = self.prev_y[slot] = sprite.y if self.track_y else sprite.rect.y
+        self.direction[slot] = getattr(sprite, 'direction', 0)
+        self.width[slot], self.height[slot] = sprite.rect.size
+
+    def remove_internal(self, sprite):
+        """Drop the sprite, moving the last slot into its place."""
+        super().remove_internal(sprite)
+        slot = self.index.pop(sprite)
+        last = len(self.slots) - 1
+        if slot != last:
+            moved = self.slots[last]
+            self.slots[slot] = moved
+            self.index[moved] = slot
+            for name, _ in self._fields:
+                array = getattr(self, name)
+                array[slot] = array[last]
+        self.slots.pop()
+
+    def refresh(self):
+        """Copy every sprite's state into the arrays, after it was set directly."""
+        count = len(self.slots)
+        slots = self.slots
+        self.x[:count] = self.prev_x[:count] = [sprite.x for sprite in slots]
+        if self.track_y:
+            self.y[:count] = [sprite.y for sprite in slots]
+        else:
+            self.y[:count] = [sprite.rect.y for sprite in slots]
+        self.prev_y[:count] = self.y[:count]
+        if self.track_direction:
+            self.direction[:count] = [sprite.direction for sprite in slots]
+        self.width[:count] = [sprite.rect.width for sprite in slots]
+        self.height[:count] = [sprite.rect.height for sprite in slots]
+
+    def move(self, dx, dy=0.0):
+        """Move every sprite by dx, and by dy in its own direction."""
+        count = len(self.slots)
+        self.x[:count] += dx
+        if dy:
+            self.y[:count] += dy * self.direction[:count]
+
+    def save_positions(self):
+        """Remember the current positions before the next step."""
+        count = len(self.slots)
+        self.prev_x[:count] = self.x[:count]
+        self.prev_y[:count] = self.y[:count]
+
+    def interpolated(self, alpha):
+        """Return (sprite, rect) pairs placed alpha of the way through the last step."""
+        count = len(self.slots)
+        prev_x, prev_y = self.prev_x[:count], self.prev_y[:count]
+        lefts = _to_pixels(prev_x + (self.x[:count] - prev_x) * alpha).tolist()
+        tops = _to_pixels(prev_y + (self.y[:count] - prev_y) * alpha).tolist()
+        return [(sprite, pygame.Rect(left, top, sprite.rect.width, sprite.rect.height))
+                for sprite, left, top in zip(self.slots, lefts, tops)]
+
+    def left(self):
+        """Return the whole-pixel left edge of every sprite."""
+        return _to_pixels(self.x[:len(self.slots)])
+
+    def right(self):
+        """Return the whole-pixel right edge of every sprite."""
+        return self.left() + self.width[:len(self.slots)]
+
+    def top(self):
+        """Return the whole-pixel top edge of every sprite."""
+        return _to_pixels(self.y[:len(self.slots)])
+
+    def bounce(self, bounds):
+        """Reverse the direction of every sprite touching the bounds."""
+        count = len(self.slots)
+        left, top = self.left(), self.top()
+        right = left + self.width[:count]
+        bottom = top + self.height[:count]
+        at_edge = ((top <= bounds.top) | (bottom >= bounds.bottom)
+                   | (left <= bounds.left) | (right >= bounds.right))
+        self.direction[:count][at_edge] *= -1
+
+    def sync(self):
+        """Copy the array state back onto the sprites."""
+        count = len(self.slots)
+        xs = self.x[:count].tolist()
+        lefts = self.left().tolist()
+        tops = self.top().tolist()
+        for sprite, x, left, top in zip(self.slots, xs, lefts, tops):
+            sprite.x = x
+            sprite.rect.topleft = (left, top)
+        if self.track_y:
+            for sprite, y in zip(self.slots, self.y[:count].tolist()):
+                sprite.y = y
+        if self.track_direction:
+            for sprite, direction in zip(self.slots, self.direction[:count].tolist()):
+                sprite.direction = direction
+
+    def cull(self, mask):
+        """Remove the sprites selected by a boolean mask and return them."""
+        culled = [self.slots[i] for i in np.flatnonzero(mask).tolist()]
+        if culled:
+            self.remove(*culled)
+        return culled
@@ -0,0 +1,175 @@
+"""A Gym-style reset()/step() environment around a headless FighterGame.
+
+Observations are built straight from entity state, never from the screen:
+an array with one row for the plane followed by fixed numbers of rows for
+enemies, bullets and power-ups. Each row is (present, x, y), the top left
+of the sprite's rect scaled to 0..1 by the screen size, so observations
+are the same with or without the entity store; unused rows are zero.
+
+Actions are integers combining the flags RIGHT, LEFT, UP, DOWN and FIRE.
+
+Needs NumPy, which the game itself does not.
+"""
+try:
+    import numpy as np
+except ImportError:  # Observations are arrays; FighterEnv says so when created
+    np = None
+
+from fighter_game import FighterGame
+from settings import Settings
+
+RIGHT, LEFT, UP, DOWN, FIRE = 1, 2, 4, 8, 16
+N_ACTIONS = 32
+
+
+class FighterEnv:
+    """A single-game environment."""
+
+    def __init__(self, settings=None, max_enemies=64, max_bullets=16, max_powerups=16,
+                 frame_skip=4, max_steps=10000, life_reward=100):
+        """Configure the observation layout and episode length.
+
+        Each step repeats its action for frame_skip simulation steps. An
+        episode ends on game over or after max_steps env steps. The
+        reward is the score gained plus life_reward per life gained (or
+        minus it per life lost).
+
+        Without settings the game keeps its sprites in plain groups: a game
+        has a few dozen sprites, too few for the entity store's NumPy calls
+        to pay for their fixed cost.
+        """
+        if np is None:
+            raise ImportError("FighterEnv needs NumPy for its observation arrays")
+        if settings is None:
+            settings = Settings()
+            settings.entity_store = False
+        self.settings = settings
+        self.limits = (('enemies', max_enemies), ('bullets', max_bullets),
+                       ('powerups', max_powerups))
+        self.observation_shape = (1 + max_enemies + max_bullets + max_powerups, 3)
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.life_reward = life_reward
+        self.scale = np.array([1 / self.settings.screen_width, 1 / self.settings.screen_height])
+        self.fg_game = None
+        self.steps = 0
+
+    def reset(self, seed=None, out=None):
+        """Start a new game and return its first observation.
+
+        The first reset creates the game; later ones restart it, which
+        plays exactly as a new game with the same seed would.
+        """
+        if self.fg_game is None:
+            self.fg_game = FighterGame(headless=True, seed=seed, settings=self.settings)
+        else:
+            self.fg_game._restart_game(seed)
+        self.steps = 0
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        """Apply action and return (observation, reward, done, info)."""
+        fg_game = self.fg_game
+        plane = fg_game.plane
+        plane.moving_right = bool(action & RIGHT)
+        plane.moving_left = bool(action & LEFT)
+        plane.moving_up = bool(action & UP)
+        plane.moving_down = bool(action & DOWN)
+        if action & FIRE:
+            fg_game._fire_bullets()
+
+        score, lives = fg_game.score, fg_game.lives
+        for _ in range(self.frame_skip):
+            fg_game._update_game()
+            if fg_game.game_over:
+                break
+        self.steps += 1
+
+        reward = fg_game.score - score + self.life_reward * (fg_game.lives - lives)
+        done = fg_game.game_over or self.steps >= self.max_steps
+        info = {'score': fg_game.score, 'lives': fg_game.lives,
+                'kills': fg_game.kills, 'frame': fg_game.frame}
+        return self.observe(out), reward, done, info
+
+    def observe(self, out=None):
+        """Fill out (or a new array) with the current observation."""
+        if out is None:
+            out = np.zeros(self.observation_shape, dtype=np.float32)
+        else:
+            out[:] = 0
+        fg_game = self.fg_game
+        plane = fg_game.plane.rect
+        out[0] = (1.0, plane.x * self.scale[0], plane.y * self.scale[1])
+
+        row = 1
+        for name, limit in self.limits:
+            group = getattr(fg_game, name)
+            count = min(len(group), limit)
+            if count:
+                rows = out[row:row + count]
+                rows[:, 0] = 1.0
+                rows[:, 1:] = self._positions(group, count) * self.scale
+            row += limit
+        return out
+
+    def _positions(self, group, count):
+        """Return a (count, 2) array of the rect positions of the first count sprites."""
+        sprites = group.sprites()[:count]
+        return np.array([sprite.rect.topleft for sprite in sprites], dtype=np.float64)
+
+
+class VectorFighterEnv:
+    """N games stepped in lockstep with batched array outputs.
+
+    Games that finish are reset automatically; their final info carries
+    'terminal': True and the returned observation is the new game's first.
+    The returned arrays are reused by the next call.
+    """
+
+    def __init__(self, count, seed=0, **kwargs):
+        """Create count environments; game i of each reset uses a fresh seed."""
+        self.envs = [FighterEnv(**kwargs) for _ in range(count)]
+        self.seed = seed
+        self.resets = 0
+        shape = (count,) + self.envs[0].observation_shape
+        self.observations = np.zeros(shape, dtype=np.float32)
+        self.rewards = np.zeros(count, dtype=np.float32)
+        self.dones = np.zeros(count, dtype=bool)
+
+    def _next_seed(self):
+        """Return the seed for the next game started."""
+        self.resets += 1
+        return self.seed + self.resets
+
+    def reset(self):
+        """Start every game and return the batched observations."""
+        for i, env in enumerate(self.envs):
+            env.reset(self._next_seed(), out=self.observations[i])
+        return self.observations
+
+    def step(self, actions):
+        """Step every game with its action and return batched results."""
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            _, reward, done, info = env.step(int(action), out=self.observations[i])
+            if done:
+                info['terminal'] = True
+                env.reset(self._next_seed(), out=self.observations[i])
+            self.rewards[i] = reward
+            self.dones[i] = done
+            infos.append(info)
+        return self.observations, self.rewards, self.dones, infos
+
+
+if __name__ == '__main__':
+    from time import perf_counter
+
+    vec = VectorFighterEnv(16)
+    vec.reset()
+    rng = np.random.default_rng(0)
+    start = perf_counter()
+    steps = 0
+    while perf_counter() - start < 5:
+        vec.step(rng.integers(0, N_ACTIONS, len(vec.envs)))
+        steps += len(vec.envs)
+    print(f"{steps / (perf_counter() - start):.0f} env steps/s")
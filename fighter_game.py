@@ -1,26 +1,80 @@
+from time import perf_counter
+_import_start = perf_counter()
+
+import os
+import struct
 import sys
 import pygame
 import random
+from functools import partial
 
 from bullet import Bullet
 from plane import Plane
 from settings import Settings
+from assets import AssetCache, AssetLoader
+from text import TextCache
 from enemy import EnemyPlane
-from background import Tree
+from background import Tree, Terrain
 from scoreboard import Scoreboard
 from button import Button
 from powerup import PowerUp
+from collision import Collisions
+from renderer import Renderer, RenderFrame
+from pool import Pool
+from profiler import FrameProfiler, StartupTrace
+from waves import WaveScheduler
+from snapshot import SnapshotRing
+from telemetry import Telemetry
+import entities
+import snapshot
+
+# Charged to the startup trace of the first game created in this process
+_import_time = perf_counter() - _import_start
 
 class FighterGame:
     """Overall class for the game"""
 
-    def __init__(self):
-        pygame.init()
+    def __init__(self, headless=False, seed=None, settings=None):
+        global _import_time
+        self.startup = StartupTrace(_import_time)
+        _import_time = 0.0
+
+        # Every random choice in the game comes from this game's own
+        # generator, so games sharing a process never disturb each other
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.random = random.Random(self.seed)
+        self.recorder = None
+
+        # Headless games use SDL's dummy video driver and never draw
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        # Only the subsystems the game uses; audio and joysticks stay off
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark('pygame')
         self.clock = pygame.time.Clock()
-        self.settings = Settings()
+        self.settings = settings or Settings()
+        self.dt = 1 / self.settings.sim_rate
         self.screen = pygame.display.set_mode((self.settings.screen_width, self.settings.screen_height))
         self.screen_rect = self.screen.get_rect()
         pygame.display.set_caption("Fighter Game")
+        self.renderer = Renderer(self)
+        self.startup.mark('display')
+
+        # Load every image once so spawning never touches the disk, decoding
+        # in the background when there are frames to keep going meanwhile.
+        # Placeholders have the real size but not the real masks, so pixel
+        # collisions (which replays must reproduce) wait for the real images
+        loader = None
+        if self.settings.async_assets and not headless and not self.settings.pixel_collisions:
+            loader = AssetLoader(self.settings.asset_workers)
+        self.assets = AssetCache(self.settings.asset_bundle, loader)
+        self.assets.preload(
+            paths=[(self.settings.plane_image, False), (self.settings.enemy_image, False)],
+            folders=[self.settings.trees_folder])
+        self.text = TextCache(self)
+        self.startup.mark('assets')
 
         # Game states
         self.game_active = True
@@ -28,80 +82,319 @@ class FighterGame:
 
         # Game assets
         self.plane = Plane(self)
-        self.bullets = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.trees = pygame.sprite.Group()
-        self.powerups = pygame.sprite.Group()
+        self.planes = [self.plane]
+        self._create_groups()
+        self._create_pools()
+        self.terrain = Terrain(self) if self.settings.terrain else None
+        if self.terrain and not headless:
+            self.deferred.append(self.terrain.prepare)
+        self.collisions = Collisions(self)
+        self.profiler = FrameProfiler(self)
+        self.startup.mark('sprites')
 
         self.bg_colour = self.settings.bg_colour
 
-        # Time tracking for fleet spawning
-        self.last_fleet_spawn_time = pygame.time.get_ticks()
-        self.next_fleet_spawn_time = self._get_next_fleet_spawn_time()
+        # Simulation steps so far, and the enemy waves timed by them
+        self.frame = 0
+        self.waves = WaveScheduler(self)
+        # Snapshots of the last steps, for rollback
+        self.history = None
+        if self.settings.rollback_frames:
+            self.history = SnapshotRing(self.settings.rollback_frames)
 
-        # Score and lives tracking
+        # Score, lives and kills tracking
         self.score = 0
         self.lives = 3
+        self.kills = 0
 
         # Initialize scoreboard
         self.sb = Scoreboard(self)
         # Initialize play again button
         self.play_button = Button(self, "Play Again")
+        self.startup.mark('hud')
+
+        # Session events and final scores, written once the first frame is out
+        self.telemetry = None
+        if self.settings.telemetry and not headless:
+            self.telemetry = Telemetry(self)
+            self.deferred.append(self.telemetry.start)
+            self.telemetry.record('session_start', seed=self.seed)
 
-        # Create initial trees
-        self._create_initial_trees()
+        # Create initial trees and the first fleet
+        if not self.terrain:
+            self._create_initial_trees()
+        self._start_waves()
+        self.startup.mark('world')
 
     def run_game(self):
-        """Start the main loop to run the game"""
-        self._create_fleet()
+        """Start the main loop to run the game
+
+        The simulation advances in fixed steps of self.dt however long each
+        frame takes; rendering shows the state between the last two steps
+        and is skipped on frames that fall behind. With
+        Settings.threaded_render on, pipeline.run_pipelined takes over.
+        """
+        if self.settings.threaded_render:
+            from pipeline import run_pipelined
+            run_pipelined(self)
+            return
+        accumulator = 0.0
+        skipped = 0
+        previous = perf_counter()
         while True:
+            now = perf_counter()
+            accumulator += min(now - previous, self.settings.max_frame_time)
+            previous = now
+
+            self.profiler.begin_frame()
             self._check_events()
-            if self.game_active:
-                self.plane.update()
-                self._maybe_spawn_fleet()
-                self._update_enemies()
-                self._update_bullets()
-                self._update_powerups()  # Update power-ups
-                self._update_trees()  # Update trees
-                self._check_collisions()  # Check for collisions
-            self._update_screen()
-            self.clock.tick(120)
-
-    def _update_screen(self):
-        """Handle updates to the screen"""
-        self.screen.fill(self.bg_colour)
-        for tree in self.trees.sprites():
-            tree.draw_tree()
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-        for powerup in self.powerups.sprites():
-            powerup.draw_powerup()
-        self.plane.blitme()
-        self.enemies.draw(self.screen)
-        self.sb.show_score()
-        self.sb.show_lives()
-        if not self.game_active and self.game_over:
-            self.sb.show_final_score()
+            self.profiler.lap('_check_events')
+            # Images decoded since the last frame are swapped in before anything moves
+            if self.assets.finalize(now + self.settings.asset_finalize_budget):
+                self.renderer.forget()
+            self.profiler.lap('_finalize_assets')
+            steps = 0
+            while accumulator >= self.dt:
+                self._update_game()
+                accumulator -= self.dt
+                steps += 1
+
+            # More than one step means this frame ran long, so let the
+            # simulation catch up before drawing again
+            if steps > 1 and skipped < self.settings.max_frame_skip:
+                skipped += 1
+            else:
+                skipped = 0
+                self._update_screen(accumulator / self.dt)
+                if self.deferred:
+                    self._finish_startup()
+            self.profiler.lap('_update_screen')
+            if not skipped:
+                self._prepare_waves(now)
+            self.profiler.lap('_prepare_waves')
+            self.profiler.end_frame()
+            if self.telemetry:
+                self.telemetry.frame_time(perf_counter() - now)
+            self.clock.tick(self.settings.max_fps)
+
+    def run_headless(self, max_frames=None, script=None, until_game_over=True):
+        """Step the game as fast as possible without drawing.
+
+        Runs until max_frames have been simulated or, if until_game_over,
+        the game is over. script is called with the game before every frame
+        and returns the events to handle in place of the keyboard, as
+        headless.ScriptedInput does for a fixed schedule. Can be
+        called again to continue from where it stopped. Returns the number
+        of frames simulated.
+        """
+        while max_frames is None or self.frame < max_frames:
+            if script:
+                for event in script(self):
+                    self._handle_event(event)
+            self._update_game()
+            if self.deferred:
+                self._finish_startup()
+            if until_game_over and self.game_over:
+                break
+        return self.frame
+
+    def _finish_startup(self):
+        """Mark the first frame and run the work deferred until after it"""
+        self.startup.mark('first_frame')
+        self.startup.first_frame_ms = self.startup.total()
+        for task in self.deferred:
+            task()
+        self.deferred = []
+        self.startup.mark('deferred')
+        if self.settings.startup_trace:
+            print(self.startup.report())
+
+    def start_recording(self, path):
+        """Record the seed and every input, to be saved to path on exit"""
+        from replay import InputRecorder
+        self.settings.record_path = path
+        self.recorder = InputRecorder(self.seed, self.settings)
+
+    def quick_save(self):
+        """Write a snapshot of the world to the quick-save file, returning whether it worked"""
+        try:
+            snapshot.save(self.settings.quicksave_path, snapshot.capture(self))
+        except OSError as error:
+            print(f"Quick-save failed: {error}")
+            return False
+        return True
+
+    def quick_load(self):
+        """Restore the world from the quick-save file, if there is a usable one"""
+        if self.recorder:
+            # A recording only holds inputs, so it could not replay the load
+            print("Quick-load is off while recording")
+            return False
+        if not os.path.exists(self.settings.quicksave_path):
+            return False
+        try:
+            snapshot.restore(self, snapshot.load(self.settings.quicksave_path))
+        except (OSError, ValueError, struct.error) as error:
+            # A stale, damaged or unreadable file leaves the game as it was
+            print(f"Quick-load failed: {error}")
+            return False
+        return True
+
+    def rollback(self, frame):
+        """Return the world to simulation step frame, if it is still kept"""
+        return self.history is not None and self.history.rollback(self, frame)
+
+    def _update_game(self):
+        """Advance the game state by one fixed step"""
+        profiler = self.profiler
+        if self.game_active:
+            if self.entity_store and self.settings.interpolate:
+                for group in (self.enemies, self.bullets, self.powerups, self.trees):
+                    group.save_positions()
+            profiler.lap('_record_step')
+            for plane in self.planes:
+                plane.update(self.dt)
+            profiler.lap('plane.update')
+            self._maybe_spawn_fleet()
+            profiler.lap('_maybe_spawn_fleet')
+            self._update_enemies()
+            profiler.lap('_update_enemies')
+            self._update_bullets()
+            profiler.lap('_update_bullets')
+            self._update_powerups()  # Update power-ups
+            profiler.lap('_update_powerups')
+            self._update_trees()  # Update trees
+            profiler.lap('_update_trees')
+            self._check_collisions()  # Check for collisions
+            profiler.lap('_check_collisions')
+        self.frame += 1
+        if self.history is not None:
+            self.history.push(self.frame, snapshot.capture(self))
+        # Saving positions, counting the step and the rollback snapshot
+        profiler.lap('_record_step')
+
+    def _create_groups(self):
+        """Create the sprite groups, backed by NumPy arrays when available"""
+        self.entity_store = self.settings.entity_store and entities.available()
+        if self.entity_store:
+            self.bullets = entities.EntityGroup()
+            self.enemies = entities.EntityGroup(track_y=True, track_direction=True)
+            self.trees = entities.EntityGroup()
+            self.powerups = entities.EntityGroup()
+        else:
+            self.bullets = pygame.sprite.Group()
+            self.enemies = pygame.sprite.Group()
+            self.trees = pygame.sprite.Group()
+            self.powerups = pygame.sprite.Group()
+
+    def _create_pools(self):
+        """Create the sprite pools, preallocated once the first frame is out"""
+        self.bullet_pool = Pool(partial(Bullet, self))
+        self.enemy_pool = Pool(partial(EnemyPlane, self))
+        self.powerup_pool = Pool(partial(PowerUp, self))
+        self.tree_pool = Pool(partial(Tree, self))
+        self.deferred = [self._reserve_pools]
+
+    def _reserve_pools(self):
+        """Preallocate every pool without disturbing the game's random stream"""
+        # New sprites pick random positions, and when this runs depends on
+        # how soon the first frame is drawn
+        state = self.random.getstate()
+        self.bullet_pool.reserve(self.settings.bullet_pool_size)
+        self.enemy_pool.reserve(self.settings.enemy_pool_size)
+        self.powerup_pool.reserve(self.settings.powerup_pool_size)
+        if not self.terrain:
+            self.tree_pool.reserve(self.settings.tree_pool_size)
+        self.random.setstate(state)
+
+    def pool_report(self):
+        """Return the usage and high-water mark of every sprite pool"""
+        return {
+            'bullets': self.bullet_pool.report(),
+            'enemies': self.enemy_pool.report(),
+            'powerups': self.powerup_pool.report(),
+            'trees': self.tree_pool.report(),
+        }
+
+    def _get_ticks(self):
+        """Return the simulation clock in milliseconds"""
+        return self.frame * 1000 // self.settings.sim_rate
+
+    def _draw_positions(self, group, alpha):
+        """Return (sprite, rect) pairs to draw, interpolated when possible"""
+        if alpha < 1.0 and self.entity_store and self.settings.interpolate:
+            return group.interpolated(alpha)
+        return [(sprite, sprite.rect) for sprite in group]
+
+    def _update_screen(self, alpha=1.0):
+        """Handle updates to the screen
+
+        alpha is how far the frame lies between the previous simulation step
+        and the current one.
+        """
+        if not self.settings.interpolate:
+            alpha = 1.0
+        self._draw_frame(self._capture_frame(alpha))
+
+    def _capture_frame(self, alpha=1.0):
+        """Return what to draw for the current state, alpha past the last step"""
+        return RenderFrame(
+            step=self.frame,
+            terrain=self.terrain.position(alpha) if self.terrain else None,
+            trees=[(tree.image, rect.topleft)
+                   for tree, rect in self._draw_positions(self.trees, alpha)],
+            bullets=[tuple(rect) for _, rect in self._draw_positions(self.bullets, alpha)],
+            powerups=[(powerup.image, rect.topleft)
+                      for powerup, rect in self._draw_positions(self.powerups, alpha)],
+            planes=[(plane.image, plane.draw_rect(alpha).topleft) for plane in self.planes],
+            enemies=[(enemy.image, rect.topleft)
+                     for enemy, rect in self._draw_positions(self.enemies, alpha)],
+            hud=(self.score, self.lives, not self.game_active and self.game_over),
+            game_over=not self.game_active and self.game_over,
+            overlay=self.profiler.show_overlay)
+
+    def _draw_frame(self, frame):
+        """Draw a captured frame and push it to the display"""
+        renderer = self.renderer
+        renderer.begin(self.terrain.blits(frame.terrain) if frame.terrain else None)
+        renderer.blits(frame.trees)
+        colour = self.settings.bullet_colour
+        for rect in frame.bullets:
+            renderer.fill(colour, rect)
+        renderer.blits(frame.powerups)
+        renderer.blits(frame.planes)
+        renderer.blits(frame.enemies)
+        renderer.begin_hud()
+        renderer.blits(self.sb.hud_blits(*frame.hud))
+        if frame.game_over:
             self.play_button.draw_button()
-        pygame.display.flip()
+        if frame.overlay:
+            self.profiler.draw_overlay(renderer)
+        renderer.present()
 
     def _check_events(self):
         """Watch for keyboard and mouse events"""
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                self._check_keydown_events(event)
-            elif event.type == pygame.KEYUP:
-                self._check_keyup_events(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                self._check_play_button(mouse_x, mouse_y)
+            self._handle_event(event)
+
+    def _handle_event(self, event):
+        """Respond to a single keyboard or mouse event"""
+        if self.recorder:
+            self.recorder.record(self.frame, event)
+        if event.type == pygame.QUIT:
+            self._quit()
+        elif event.type == pygame.KEYDOWN:
+            self._check_keydown_events(event)
+        elif event.type == pygame.KEYUP:
+            self._check_keyup_events(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            mouse_x, mouse_y = event.pos
+            self._check_play_button(mouse_x, mouse_y)
 
     def _check_keydown_events(self, event):
         """Respond to keypresses"""
         if event.key == pygame.K_ESCAPE:
-            sys.exit()
+            self._quit()
         elif event.key == pygame.K_d:
             self.plane.moving_right = True
         elif event.key == pygame.K_a:
@@ -112,6 +405,12 @@ class FighterGame:
             self.plane.moving_down = True
         elif event.key == pygame.K_SPACE:
             self._fire_bullets()
+        elif event.key == pygame.K_F3:
+            self.profiler.toggle_overlay()
+        elif event.key == pygame.K_F5:
+            self.quick_save()
+        elif event.key == pygame.K_F9:
+            self.quick_load()
 
     def _check_keyup_events(self, event):
         """Respond to key releases"""
@@ -124,157 +423,259 @@ class FighterGame:
         elif event.key == pygame.K_s:
             self.plane.moving_down = False
 
+    def _quit(self):
+        """Shut down the game's workers and exit, reporting on them if asked"""
+        if self.settings.print_stats:
+            print(self.assets.report())
+            print(self.text.report())
+            for name, report in self.pool_report().items():
+                print(f"{name} pool: {report}")
+        if self.assets.loader:
+            self.assets.loader.close()
+        if self.settings.profile_dump:
+            self.profiler.dump(self.settings.profile_dump)
+        self.profiler.close()
+        if self.recorder:
+            self.recorder.save(self.settings.record_path, self)
+        if self.telemetry:
+            self.telemetry.record('session_end', step=self.frame, score=self.score,
+                                  dropped=self.telemetry.dropped)
+            self.telemetry.close()
+            if self.settings.print_stats:
+                print(self.telemetry.report())
+        sys.exit()
+
     def _check_play_button(self, mouse_x, mouse_y):
         """Start a new game when the player clicks Play Again"""
+        # Clicks come in screen pixels, the coordinates of the HUD and of
+        # the world whatever scale the world is drawn at
         if self.play_button.rect.collidepoint(mouse_x, mouse_y):
             self._restart_game()
 
     def _create_initial_trees(self):
         """Create initial brown trees in the background at random positions"""
         for _ in range(20):  # Number of initial trees
-            new_tree = Tree(self, initial=True)
+            new_tree = self.tree_pool.acquire(initial=True)
             self.trees.add(new_tree)
 
     def _update_trees(self):
         """Update positions of trees and create new ones if necessary"""
-        self.trees.update()
-        for tree in self.trees.copy():
-            if tree.rect.right <= 0:
-                self.trees.remove(tree)
-                new_tree = Tree(self, initial=False)
-                self.trees.add(new_tree)
-
-    def _fire_bullets(self):
-        """Create a new bullet and add it to the bullets group"""
+        if self.terrain:
+            self.terrain.update(self.dt)
+            return
+        if self.entity_store:
+            self.trees.move(-self.settings.tree_speed * self.dt)
+            self.trees.sync()
+            culled = self.trees.cull(self.trees.right() <= 0)
+        else:
+            self.trees.update(self.dt)
+            culled = [tree for tree in self.trees if tree.rect.right <= 0]
+            self.trees.remove(*culled)
+        self.tree_pool.release_all(culled)
+        for _ in culled:
+            new_tree = self.tree_pool.acquire(initial=False)
+            self.trees.add(new_tree)
+
+    def _fire_bullets(self, plane=None):
+        """Create a new bullet in front of plane (the player's by default)"""
         if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
+            new_bullet = self.bullet_pool.acquire(plane or self.plane)
             self.bullets.add(new_bullet)
 
+    def add_plane(self):
+        """Add another player's plane, flying in the next lane down"""
+        plane = Plane(self, lane=len(self.planes))
+        self.planes.append(plane)
+        return plane
+
     def _update_bullets(self):
         """Update the bullets and check for collisions with enemies"""
-        self.bullets.update()
-
         # Remove bullets that have moved off the screen
-        for bullet in self.bullets.copy():
-            if bullet.rect.left >= self.screen_rect.right:
-                self.bullets.remove(bullet)
+        if self.entity_store:
+            self.bullets.move(self.settings.bullet_speed * self.dt)
+            self.bullets.sync()
+            culled = self.bullets.cull(self.bullets.left() >= self.screen_rect.right)
+        else:
+            self.bullets.update(self.dt)
+            culled = [bullet for bullet in self.bullets if bullet.rect.left >= self.screen_rect.right]
+            self.bullets.remove(*culled)
+        self.bullet_pool.release_all(culled)
 
         # Check for collisions between bullets and enemies
-        collisions = pygame.sprite.groupcollide(self.bullets, self.enemies, True, True)
+        collisions = self.collisions.groupcollide(
+            self.bullets, self.enemies, self.collisions.enemies, True, True)
 
         if collisions:
+            kills = self.kills
             for enemies in collisions.values():
                 self.score += 10 * len(enemies)
-                self.sb.prep_score()  # Update the score display
+                self.kills += len(enemies)
                 self._maybe_drop_powerup(enemies[0])  # Drop a power-up
+                self.enemy_pool.release_all(enemies)
+            self.bullet_pool.release_all(collisions)
+            if self.telemetry:
+                self.telemetry.record('kills', step=self.frame, kills=self.kills - kills,
+                                      score=self.score)
 
     def _maybe_drop_powerup(self, enemy):
         """Randomly drop a power-up from the destroyed enemy"""
-        if random.random() < self.settings.powerup_drop_chance:
-            powerup = PowerUp(self, 'extra_life')
+        if self.random.random() < self.settings.powerup_drop_chance:
+            powerup = self.powerup_pool.acquire('extra_life')
             powerup.rect.center = enemy.rect.center
             self.powerups.add(powerup)
 
     def _update_powerups(self):
         """Update power-ups and check for collisions with the plane"""
-        self.powerups.update()
-
         # Remove power-ups that have moved off the screen
-        for powerup in self.powerups.copy():
-            if powerup.rect.left <= 0:
-                self.powerups.remove(powerup)
-
-        # Check for collisions between the plane and power-ups
-        collisions = pygame.sprite.spritecollide(self.plane, self.powerups, True)
-        if collisions:
-            for powerup in collisions:
-                if powerup.powerup_type == 'extra_life':
-                    self.lives += 1
-                    self.sb.prep_lives()  # Update the lives display
-
-    def _create_enemy(self, position_x, position_y, direction):
-        """Create an enemy ship"""
-        new_enemy = EnemyPlane(self, direction)  # Pass direction to EnemyPlane
-        new_enemy.x = position_x
-        new_enemy.y = position_y
-        new_enemy.rect.x = position_x
-        new_enemy.rect.y = position_y
-        self.enemies.add(new_enemy)
-
-    def _create_fleet(self):
-        """Create an enemy fleet"""
-        num_enemies = random.randint(5, 12)  # Random number of enemies
-        direction = random.choice([-1, 1])  # Randomize initial direction
-        enemy_width, enemy_height = EnemyPlane(self, direction).rect.size  # Pass direction to EnemyPlane
-        current_x = self.settings.screen_width - enemy_width
-        current_y = enemy_height
-
-        for _ in range(num_enemies):
-            self._create_enemy(current_x, current_y, direction)
-            current_y += 1.5 * enemy_height
-            if current_y > self.settings.screen_height - enemy_height:
-                break
+        if self.entity_store:
+            self.powerups.move(-self.settings.powerup_speed * self.dt)
+            self.powerups.sync()
+            culled = self.powerups.cull(self.powerups.left() <= 0)
+        else:
+            self.powerups.update(self.dt)
+            culled = [powerup for powerup in self.powerups if powerup.rect.left <= 0]
+            self.powerups.remove(*culled)
+        self.powerup_pool.release_all(culled)
+
+        # Check for collisions between the planes and power-ups
+        self.collisions.powerups.rebuild(self.powerups)
+        for plane in self.planes:
+            collisions = self.collisions.spritecollide(
+                plane, self.powerups, self.collisions.powerups, True)
+            if collisions:
+                for powerup in collisions:
+                    if powerup.powerup_type == 'extra_life':
+                        self.lives += 1
+                self.powerup_pool.release_all(collisions)
+
+    def _start_waves(self):
+        """Start the wave timeline, spawning its first fleet right away"""
+        self._record_spawn(self.waves.restart(self._get_ticks()))
 
     def _maybe_spawn_fleet(self):
-        """Check the time and spawn a new fleet if needed"""
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_fleet_spawn_time >= self.next_fleet_spawn_time:
-            self._create_fleet()
-            self.last_fleet_spawn_time = current_time
-            self.next_fleet_spawn_time = self._get_next_fleet_spawn_time()
+        """Spawn the waves that are due"""
+        self._record_spawn(self.waves.update(self._get_ticks()))
+
+    def _record_spawn(self, spawned):
+        """Record the number of enemies just spawned, if any"""
+        if spawned and self.telemetry:
+            self.telemetry.record('spawn', step=self.frame, enemies=spawned)
 
-    def _get_next_fleet_spawn_time(self):
-        """Generate a random time between 1.5 and 5 seconds for the next fleet spawn"""
-        return random.randint(1500, 5000)
+    def _prepare_waves(self, frame_start):
+        """Build upcoming waves with the time left in this frame"""
+        deadline = perf_counter() + self.settings.wave_build_budget
+        if self.settings.max_fps:
+            deadline = min(deadline, frame_start + 1 / self.settings.max_fps)
+        self.waves.prepare(deadline)
 
     def _update_enemies(self):
         """Update enemy positions"""
-        self.enemies.update()
-
         # Check for enemies at the left of the screen and remove any that make it
-        for enemy in self.enemies.copy():
-            if enemy.rect.right <= 0:
-                self.enemies.remove(enemy)
+        if self.entity_store:
+            distance = self.settings.enemy_speed * self.dt
+            self.enemies.move(-distance, -distance)
+            self.enemies.bounce(self.screen_rect)
+            self.enemies.sync()
+            culled = self.enemies.cull(self.enemies.right() <= 0)
+        else:
+            self.enemies.update(self.dt)
+            culled = [enemy for enemy in self.enemies if enemy.rect.right <= 0]
+            self.enemies.remove(*culled)
+        self.enemy_pool.release_all(culled)
+
+        # Bucket the enemies for this frame's collision checks
+        self.collisions.enemies.rebuild(self.enemies)
 
     def _check_collisions(self):
-        """Check for collisions between the player's plane and enemies"""
-        if pygame.sprite.spritecollideany(self.plane, self.enemies):
-            self._plane_hit()
+        """Check for collisions between the players' planes and enemies"""
+        for plane in self.planes:
+            if self.collisions.spritecollideany(plane, self.enemies, self.collisions.enemies):
+                self._plane_hit()
+                break
 
     def _plane_hit(self):
         """Respond to the player being hit by an enemy"""
         if self.lives > 0:
             self.lives -= 1
-            self.sb.prep_lives()  # Update the lives display
+            if self.telemetry:
+                self.telemetry.record('life_lost', step=self.frame, lives=self.lives)
             self._reset_game()
         else:
             self._game_over()
 
     def _reset_game(self):
         """Reset the game state after the player loses a life"""
-        self.enemies.empty()
-        self.bullets.empty()
-        self.powerups.empty()
-        self.plane.center_plane()
-        self._create_fleet()
+        self._empty_group(self.enemies, self.enemy_pool)
+        self._empty_group(self.bullets, self.bullet_pool)
+        self._empty_group(self.powerups, self.powerup_pool)
+        for plane in self.planes:
+            plane.center_plane()
+        self._start_waves()
+
+    def _empty_group(self, group, pool):
+        """Remove every sprite from group and return them to pool"""
+        sprites = group.sprites()
+        group.empty()
+        pool.release_all(sprites)
 
     def _game_over(self):
         """Handle the game over state"""
         self.game_active = False
         self.game_over = True
-        self.sb.show_final_score()
-        self.play_button.draw_button()
-
-    def _restart_game(self):
-        """Restart the game"""
+        if self.telemetry:
+            self.telemetry.record('game_over', player=self.settings.player_name,
+                                  score=self.score, kills=self.kills, step=self.frame,
+                                  seed=self.seed)
+
+    def _restart_game(self, seed=None):
+        """Restart the game, starting the world over from seed if one is given"""
+        if self.telemetry:
+            self.telemetry.record('restart', step=self.frame)
         self.score = 0
         self.lives = 3
+        self.kills = 0
         self.game_active = True
         self.game_over = False
-        self.sb.prep_score()
-        self.sb.prep_lives()
+        if seed is not None:
+            self._reseed(seed)
         self._reset_game()
 
+    def _reseed(self, seed):
+        """Put the clock, RNG and background back as a new game with seed has them"""
+        self.seed = seed
+        # Sprites and wave sources hold this generator, so it is reseeded in place
+        self.random.seed(seed)
+        self.frame = 0
+        if self.history is not None:
+            self.history = SnapshotRing(self.settings.rollback_frames)
+        if self.terrain:
+            self.terrain.seed = seed
+            self.terrain.first = 0
+            self.terrain.x = self.terrain.prev_x = 0.0
+            self.terrain.rebuild()
+        else:
+            self._empty_group(self.trees, self.tree_pool)
+            self._create_initial_trees()
+
 if __name__ == "__main__":
-    fg = FighterGame()
-    fg.run_game()
+    settings = Settings()
+    # Telemetry writes its log and leaderboard in the current directory
+    settings.telemetry = '--telemetry' in sys.argv
+    if '--waves' in sys.argv:
+        settings.wave_file = sys.argv[sys.argv.index('--waves') + 1]
+    if '--dirty' in sys.argv:
+        # Trees as sprites over a plain background, so little changes each frame
+        settings.render_mode = 'dirty'
+        settings.terrain = False
+    fg = FighterGame(headless='--headless' in sys.argv, settings=settings)
+    fg.settings.startup_trace = '--startup-trace' in sys.argv
+    fg.settings.print_stats = '--stats' in sys.argv
+    if fg.headless:
+        print(f"Simulated {fg.run_headless(max_frames=12000)} frames, score {fg.score}")
+    else:
+        if '--profile-dump' in sys.argv:
+            fg.settings.profile_dump = sys.argv[sys.argv.index('--profile-dump') + 1]
+        fg.settings.threaded_render = '--threaded' in sys.argv
+        if '--record' in sys.argv:
+            fg.start_recording(sys.argv[sys.argv.index('--record') + 1])
+        fg.run_game()
@@ -0,0 +1,25 @@
+import pygame
+
+
+def key_event(event_type, key):
+    """Build a synthetic keyboard event."""
+    return pygame.event.Event(event_type, key=key)
+
+
+class ScriptedInput:
+    """A class to replay a fixed schedule of inputs into a headless game."""
+
+    def __init__(self, schedule=()):
+        """Build the script from (frame, event) pairs."""
+        self.schedule = {}
+        for frame, event in schedule:
+            self.schedule.setdefault(frame, []).append(event)
+
+    def press(self, frame, key, hold=1):
+        """Press key on frame and release it hold frames later."""
+        self.schedule.setdefault(frame, []).append(key_event(pygame.KEYDOWN, key))
+        self.schedule.setdefault(frame + hold, []).append(key_event(pygame.KEYUP, key))
+
+    def __call__(self, fg_game):
+        """Return the events scheduled for the game's current frame."""
+        return self.schedule.get(fg_game.frame, ())
@@ -0,0 +1,733 @@
+"""Two-player FighterGame over UDP.
+
+An authoritative server runs the simulation and broadcasts world
+snapshots; each snapshot is delta-compressed against the last one the
+client acknowledged. Clients predict their own plane from their inputs
+and draw everything else interpolated between snapshots.
+
+    python net.py server --port 5555
+    python net.py client --port 5555             # player 1
+    python net.py client --port 5555             # player 2, same session
+    python net.py loadtest --sessions 20 --seconds 10
+
+Packets are a struct header followed by varints:
+
+    HELLO     type, session
+    WELCOME   type, session, player (255 when the session or the server
+              is full), tick
+    INPUT     type, session, player, input seq, acked snapshot tick,
+              movement bits, shots fired so far (mod 256)
+    SNAPSHOT  type, tick, base tick (0 for a full snapshot), last input
+              seq applied, then score, lives, flags and three id-sorted
+              lists: removed ids, spawned (id, kind, x, y) and moved
+              (id, dx, dy), with ids delta-coded and coordinates zigzagged
+"""
+import argparse
+import os
+import random
+import socket
+import statistics
+import struct
+import time
+import types
+from collections import deque
+from time import perf_counter
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame
+
+from replay import read_varint, write_varint
+from settings import Settings
+
+HELLO, WELCOME, INPUT, SNAPSHOT = range(1, 5)
+HELLO_PACKET = struct.Struct('<BI')
+WELCOME_PACKET = struct.Struct('<BIBI')
+INPUT_PACKET = struct.Struct('<BIBIIBB')
+SNAPSHOT_HEADER = struct.Struct('<BIII')
+FULL = 255
+
+# Movement bits, as in env.py
+RIGHT, LEFT, UP, DOWN = 1, 2, 4, 8
+
+# Entity kinds; the planes of players 0 and 1 always have ids 0 and 1
+PLANE, ENEMY, BULLET, POWERUP = range(4)
+GAME_OVER = 1
+
+MAX_PACKET = 65507
+
+
+def _zigzag(value):
+    """Map a signed integer onto an unsigned one, small magnitudes first."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    """Undo _zigzag."""
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+def encode_snapshot(tick, base_tick, input_seq, score, lives, flags, entities, base):
+    """Return a snapshot packet of entities, delta-coded against base.
+
+    entities and base map ids to (kind, x, y); base is empty for a full
+    snapshot.
+    """
+    out = bytearray(SNAPSHOT_HEADER.pack(SNAPSHOT, tick, base_tick, input_seq))
+    write_varint(out, score)
+    write_varint(out, lives)
+    out.append(flags)
+
+    removed = sorted(base.keys() - entities.keys())
+    spawned = []
+    moved = []
+    for net_id in sorted(entities):
+        state = entities[net_id]
+        old = base.get(net_id)
+        if old is None:
+            spawned.append((net_id, state))
+        elif old != state:
+            moved.append((net_id, state[1] - old[1], state[2] - old[2]))
+
+    write_varint(out, len(removed))
+    previous = 0
+    for net_id in removed:
+        write_varint(out, net_id - previous)
+        previous = net_id
+    write_varint(out, len(spawned))
+    previous = 0
+    for net_id, (kind, x, y) in spawned:
+        write_varint(out, net_id - previous)
+        out.append(kind)
+        write_varint(out, _zigzag(x))
+        write_varint(out, _zigzag(y))
+        previous = net_id
+    write_varint(out, len(moved))
+    previous = 0
+    for net_id, dx, dy in moved:
+        write_varint(out, net_id - previous)
+        write_varint(out, _zigzag(dx))
+        write_varint(out, _zigzag(dy))
+        previous = net_id
+    return out
+
+
+def decode_snapshot(data, bases):
+    """Decode a snapshot packet against the states in bases, a tick-keyed dict.
+
+    Returns (tick, input_seq, score, lives, flags, entities), or None when
+    the packet's base state is not in bases. A truncated or garbled
+    packet raises IndexError, KeyError or struct.error.
+    """
+    _, tick, base_tick, input_seq = SNAPSHOT_HEADER.unpack_from(data)
+    if base_tick and base_tick not in bases:
+        return None
+    entities = dict(bases[base_tick]) if base_tick else {}
+    offset = SNAPSHOT_HEADER.size
+    score, offset = read_varint(data, offset)
+    lives, offset = read_varint(data, offset)
+    flags = data[offset]
+    offset += 1
+
+    count, offset = read_varint(data, offset)
+    net_id = 0
+    for _ in range(count):
+        delta, offset = read_varint(data, offset)
+        net_id += delta
+        del entities[net_id]
+    count, offset = read_varint(data, offset)
+    net_id = 0
+    for _ in range(count):
+        delta, offset = read_varint(data, offset)
+        net_id += delta
+        kind = data[offset]
+        x, offset = read_varint(data, offset + 1)
+        y, offset = read_varint(data, offset)
+        entities[net_id] = (kind, _unzigzag(x), _unzigzag(y))
+    count, offset = read_varint(data, offset)
+    net_id = 0
+    for _ in range(count):
+        delta, offset = read_varint(data, offset)
+        net_id += delta
+        dx, offset = read_varint(data, offset)
+        dy, offset = read_varint(data, offset)
+        kind, x, y = entities[net_id]
+        entities[net_id] = (kind, x + _unzigzag(dx), y + _unzigzag(dy))
+    return tick, input_seq, score, lives, flags, entities
+
+
+class RemotePlayer:
+    """A class to track one client connected to a session."""
+
+    def __init__(self, address, player, plane):
+        self.address = address
+        self.player = player
+        self.plane = plane
+        self.input_seq = 0
+        self.shots = 0
+        self.ack = 0
+        self.last_heard = perf_counter()
+        self.bytes_sent = 0
+
+
+class Session:
+    """A class to run one two-player game for its clients."""
+
+    def __init__(self, session_id, seed, settings):
+        """Start a headless game with a second plane."""
+        from fighter_game import FighterGame
+
+        self.session_id = session_id
+        self.fg_game = FighterGame(headless=True, seed=seed, settings=settings)
+        self.planes = [self.fg_game.plane, self.fg_game.add_plane()]
+        # A plane is only in play, and can only be hit, while a player holds it
+        self.fg_game.planes = []
+        self.players = {}
+        self.history = {}
+        # Network ids by (kind, pool spawn number), so a recycled sprite gets a new id
+        self.ids = {}
+        self.next_id = len(self.planes)
+        self.tick_times = []
+        # A finished game is held, flagged, until a snapshot has carried the
+        # flag and net_game_over_delay has passed, and then started again
+        self.restart_steps = round(settings.net_game_over_delay * settings.sim_rate)
+        self.game_over_step = None
+        self.game_over_sent = False
+
+    def join(self, address):
+        """Return the player number for address, or None if the session is full."""
+        player = self.players.get(address)
+        if player is None:
+            taken = {player.player for player in self.players.values()}
+            free = [number for number in range(len(self.planes)) if number not in taken]
+            if not free:
+                return None
+            player = RemotePlayer(address, free[0], self.planes[free[0]])
+            self.players[address] = player
+            plane = player.plane
+            plane.center_plane()
+            self.fg_game.planes.append(plane)
+            self.fg_game.planes.sort(key=self.planes.index)
+        return player.player
+
+    def leave(self, address):
+        """Drop the player at address and take its plane out of play."""
+        plane = self.players.pop(address).plane
+        plane.moving_right = plane.moving_left = False
+        plane.moving_up = plane.moving_down = False
+        self.fg_game.planes.remove(plane)
+
+    def apply_input(self, address, seq, ack, bits, shots):
+        """Take a client's latest input; stale or reordered packets are ignored."""
+        player = self.players.get(address)
+        if player is None or seq <= player.input_seq:
+            return
+        player.input_seq = seq
+        player.ack = max(player.ack, ack)
+        player.last_heard = perf_counter()
+        plane = player.plane
+        plane.moving_right = bool(bits & RIGHT)
+        plane.moving_left = bool(bits & LEFT)
+        plane.moving_up = bool(bits & UP)
+        plane.moving_down = bool(bits & DOWN)
+        for _ in range((shots - player.shots) % 256):
+            self.fg_game._fire_bullets(plane)
+        player.shots = shots
+
+    def step(self, sock, send_snapshot):
+        """Advance the game one step and, if asked, send every player a snapshot."""
+        start = perf_counter()
+        fg_game = self.fg_game
+        fg_game._update_game()
+        if fg_game.game_over:
+            if self.game_over_step is None:
+                self.game_over_step = fg_game.frame
+            if (self.game_over_sent
+                    and fg_game.frame - self.game_over_step >= self.restart_steps):
+                fg_game._restart_game()
+                self.game_over_step = None
+                self.game_over_sent = False
+        if send_snapshot:
+            self._broadcast(sock)
+        self.tick_times.append(perf_counter() - start)
+
+    def _capture(self):
+        """Return the world as a dict of id -> (kind, x, y)."""
+        entities = {}
+        for number, plane in enumerate(self.planes):
+            if plane in self.fg_game.planes:
+                entities[number] = (PLANE, plane.rect.x, plane.rect.y)
+        ids = {}
+        for kind, group in ((ENEMY, self.fg_game.enemies), (BULLET, self.fg_game.bullets),
+                            (POWERUP, self.fg_game.powerups)):
+            for sprite in group:
+                key = (kind, sprite.spawn)
+                net_id = self.ids.get(key)
+                if net_id is None:
+                    net_id = self.next_id
+                    self.next_id += 1
+                ids[key] = net_id
+                entities[net_id] = (kind, sprite.rect.x, sprite.rect.y)
+        self.ids = ids
+        return entities
+
+    def _broadcast(self, sock):
+        """Send each player the world, delta-coded against what it last acknowledged."""
+        fg_game = self.fg_game
+        tick = fg_game.frame
+        entities = self._capture()
+        self.history[tick] = entities
+        for old in [old for old in self.history if old < tick - fg_game.settings.net_history]:
+            del self.history[old]
+
+        flags = GAME_OVER if fg_game.game_over else 0
+        if flags and self.players:
+            self.game_over_sent = True
+        for player in self.players.values():
+            base_tick = player.ack if player.ack in self.history else 0
+            packet = encode_snapshot(tick, base_tick, player.input_seq, fg_game.score,
+                                     fg_game.lives, flags, entities,
+                                     self.history[base_tick] if base_tick else {})
+            sock.sendto(packet, player.address)
+            player.bytes_sent += len(packet)
+
+
+class GameServer:
+    """A class to host sessions on one UDP socket at the simulation rate."""
+
+    def __init__(self, host='127.0.0.1', port=0, seed=0, settings=None):
+        """Bind the socket; port 0 picks a free one (see self.address)."""
+        self.settings = settings or Settings()
+        self.seed = seed
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.sessions = {}
+        self.ticks = 0
+        self.late_ticks = 0
+        self.bad_packets = 0
+        self.refused = 0
+
+    def poll(self):
+        """Handle every datagram waiting on the socket."""
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_PACKET)
+            except BlockingIOError:
+                return
+            try:
+                self._handle(data, address)
+            except (IndexError, struct.error):
+                # Anyone can send us anything; a garbled packet is just dropped
+                self.bad_packets += 1
+
+    def _handle(self, data, address):
+        """Handle one datagram; raises IndexError or struct.error if it is malformed."""
+        if data[0] == HELLO and len(data) == HELLO_PACKET.size:
+            _, session_id = HELLO_PACKET.unpack(data)
+            session = self.sessions.get(session_id)
+            if session is None:
+                # Each session is a whole game, so only so many are hosted at once
+                if len(self.sessions) >= self.settings.net_max_sessions:
+                    self.refused += 1
+                    self.sock.sendto(WELCOME_PACKET.pack(WELCOME, session_id, FULL, 0), address)
+                    return
+                session = Session(session_id, self.seed + session_id, self.settings)
+                self.sessions[session_id] = session
+            player = session.join(address)
+            self.sock.sendto(WELCOME_PACKET.pack(
+                WELCOME, session_id, FULL if player is None else player,
+                session.fg_game.frame), address)
+        elif data[0] == INPUT and len(data) == INPUT_PACKET.size:
+            _, session_id, _, seq, ack, bits, shots = INPUT_PACKET.unpack(data)
+            session = self.sessions.get(session_id)
+            if session:
+                session.apply_input(address, seq, ack, bits, shots)
+        else:
+            self.bad_packets += 1
+
+    def tick(self):
+        """Step every session once, sending snapshots every few steps.
+
+        Players not heard from for net_timeout seconds are dropped, and
+        sessions left without players are closed.
+        """
+        self.poll()
+        send = self.ticks % self.settings.net_snapshot_interval == 0
+        now = perf_counter()
+        for session_id, session in list(self.sessions.items()):
+            for address, player in list(session.players.items()):
+                if now - player.last_heard > self.settings.net_timeout:
+                    session.leave(address)
+            if not session.players:
+                del self.sessions[session_id]
+                continue
+            session.step(self.sock, send)
+        self.ticks += 1
+
+    def serve(self, seconds=None):
+        """Tick at the simulation rate for seconds, or forever."""
+        _run_fixed_rate(self.settings.sim_rate, seconds, self.tick, self)
+
+    def stats(self):
+        """Return tick cost and bandwidth figures for every session so far."""
+        times = sorted(t for session in self.sessions.values() for t in session.tick_times)
+        sent = [player.bytes_sent for session in self.sessions.values()
+                for player in session.players.values()]
+        return {
+            'sessions': len(self.sessions),
+            'ticks': self.ticks,
+            'late_ticks': self.late_ticks,
+            'bad_packets': self.bad_packets,
+            'refused': self.refused,
+            'session_tick_ms': {
+                'mean': statistics.fmean(times) * 1000 if times else 0.0,
+                'p95': times[int(0.95 * (len(times) - 1))] * 1000 if times else 0.0,
+            },
+            'bytes_sent_per_client': statistics.fmean(sent) if sent else 0.0,
+        }
+
+
+def _run_fixed_rate(rate, seconds, step, counter):
+    """Call step rate times a second, counting late steps on counter."""
+    interval = 1 / rate
+    start = next_step = perf_counter()
+    while seconds is None or next_step - start < seconds:
+        step()
+        next_step += interval
+        delay = next_step - perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            counter.late_ticks += 1
+            if delay < -0.25:
+                # Too far behind to catch up; drop the missed steps
+                next_step = perf_counter()
+
+
+class NetClient:
+    """A class to connect to a session and rebuild its world from snapshots."""
+
+    def __init__(self, address, session=0, settings=None, timeout=2.0):
+        """Join session on the server at address, retrying HELLO until timeout."""
+        self.settings = settings or Settings()
+        self.session = session
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect(address)
+        self.player = self._join(timeout)
+        self.sock.setblocking(False)
+
+        # Decoded states by tick, kept as delta bases, and the latest few
+        # (tick, arrival time, entities) for interpolation
+        self.states = {}
+        self.snapshots = deque(maxlen=8)
+        self.tick = 0
+        self.score = 0
+        self.lives = 0
+        self.flags = 0
+
+        # Inputs sent but not yet applied by the server, for prediction
+        self.input_seq = 0
+        self.shots = 0
+        self.pending = deque()
+        self.acked_input = 0
+
+        self.bytes_received = 0
+        self.snapshots_received = 0
+        self.snapshots_dropped = 0
+
+    def _join(self, timeout):
+        """Send HELLO until the server answers and return our player number."""
+        self.sock.settimeout(0.2)
+        deadline = perf_counter() + timeout
+        while perf_counter() < deadline:
+            self.sock.send(HELLO_PACKET.pack(HELLO, self.session))
+            try:
+                data = self.sock.recv(MAX_PACKET)
+            except (socket.timeout, ConnectionRefusedError):
+                continue
+            if data[0] == WELCOME:
+                _, _, player, _ = WELCOME_PACKET.unpack(data)
+                if player == FULL:
+                    raise ConnectionError(f"session {self.session} or the server is full")
+                return player
+        raise ConnectionError("no answer from the server")
+
+    def send_input(self, bits, fire=False):
+        """Send this step's movement bits, plus a shot if fire."""
+        self.input_seq += 1
+        if fire:
+            self.shots = (self.shots + 1) % 256
+        self.pending.append((self.input_seq, bits))
+        self.sock.send(INPUT_PACKET.pack(INPUT, self.session, self.player, self.input_seq,
+                                         self.tick, bits, self.shots))
+
+    def poll(self):
+        """Decode every snapshot waiting; returns True if any arrived."""
+        arrived = False
+        while True:
+            try:
+                data = self.sock.recv(MAX_PACKET)
+            except (BlockingIOError, ConnectionRefusedError):
+                return arrived
+            self.bytes_received += len(data)
+            if not data or data[0] != SNAPSHOT:
+                continue
+            try:
+                decoded = decode_snapshot(data, self.states)
+            except (IndexError, KeyError, struct.error):
+                decoded = None
+            if decoded is None or decoded[0] <= self.tick:
+                self.snapshots_dropped += 1
+                continue
+            tick, input_seq, self.score, self.lives, self.flags, entities = decoded
+            self.snapshots_received += 1
+            self.states[tick] = entities
+            for old in [old for old in self.states if old < tick - self.settings.net_history]:
+                del self.states[old]
+            self.snapshots.append((tick, perf_counter(), entities))
+            self.tick = tick
+            self.acked_input = input_seq
+            while self.pending and self.pending[0][0] <= input_seq:
+                self.pending.popleft()
+            arrived = True
+
+    def entities(self):
+        """Return the latest known world as id -> (kind, x, y)."""
+        return self.states.get(self.tick, {})
+
+    def interpolated(self, delay):
+        """Return the world as it was delay seconds ago, interpolated by id."""
+        if not self.snapshots:
+            return {}
+        tick, arrived, entities = self.snapshots[-1]
+        render_tick = tick + (perf_counter() - arrived - delay) * self.settings.sim_rate
+        older = newer = self.snapshots[0]
+        for snapshot in self.snapshots:
+            if snapshot[0] <= render_tick:
+                older = snapshot
+            else:
+                newer = snapshot
+                break
+        else:
+            return self.snapshots[-1][2]
+        span = newer[0] - older[0]
+        t = min(1.0, max(0.0, (render_tick - older[0]) / span)) if span else 1.0
+        blended = {}
+        for net_id, (kind, x, y) in newer[2].items():
+            old = older[2].get(net_id)
+            if old is not None:
+                x = old[1] + (x - old[1]) * t
+                y = old[2] + (y - old[2]) * t
+            blended[net_id] = (kind, x, y)
+        return blended
+
+    def close(self):
+        self.sock.close()
+
+
+class ClientGame:
+    """A class to play a networked session in a window.
+
+    Provides what Plane, Scoreboard and the renderer need from a game, so
+    the client draws with the same code as FighterGame.
+    """
+
+    def __init__(self, address, session=0, settings=None):
+        """Open the window and join the session."""
+        from assets import AssetCache
+        from plane import Plane
+        from renderer import Renderer
+        from scoreboard import Scoreboard
+        from text import TextCache
+
+        pygame.display.init()
+        pygame.font.init()
+        self.settings = settings or Settings()
+        self.settings.render_mode = 'full'
+        self.dt = 1 / self.settings.sim_rate
+        self.screen = pygame.display.set_mode((self.settings.screen_width,
+                                               self.settings.screen_height))
+        self.screen_rect = self.screen.get_rect()
+        pygame.display.set_caption("Fighter Game (network)")
+        self.renderer = Renderer(self)
+        self.assets = AssetCache(self.settings.asset_bundle)
+        self.text = TextCache(self)
+        self.clock = pygame.time.Clock()
+
+        self.client = NetClient(address, session, self.settings)
+        self.score = 0
+        self.lives = 0
+        self.plane = Plane(self, lane=self.client.player)
+        self.sb = Scoreboard(self)
+        self.enemy_image = self.assets.image(self.settings.enemy_image)
+        self.plane_image = self.plane.image
+        self.powerup_image = self.text.render('L', 48, (255, 0, 0))
+        self.bullet_size = (self.settings.bullet_width, self.settings.bullet_height)
+        self.bits = 0
+
+    def run(self):
+        """Play until the window is closed or ESC is pressed."""
+        while True:
+            fire = False
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (
+                        event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    self.client.close()
+                    return
+                if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                    bit = {pygame.K_d: RIGHT, pygame.K_a: LEFT,
+                           pygame.K_w: UP, pygame.K_s: DOWN}.get(event.key, 0)
+                    if event.type == pygame.KEYDOWN:
+                        self.bits |= bit
+                        fire = fire or event.key == pygame.K_SPACE
+                    else:
+                        self.bits &= ~bit
+            self.client.send_input(self.bits, fire)
+            self.client.poll()
+            self._predict()
+            self._draw()
+            self.clock.tick(self.settings.sim_rate)
+
+    def _predict(self):
+        """Place our plane where the server had it, plus the inputs it has not seen."""
+        state = self.client.entities().get(self.client.player)
+        if state is None:
+            return
+        plane = self.plane
+        plane.x = plane.rect.x = state[1]
+        plane.y = plane.rect.y = state[2]
+        for _, bits in self.client.pending:
+            plane.moving_right = bool(bits & RIGHT)
+            plane.moving_left = bool(bits & LEFT)
+            plane.moving_up = bool(bits & UP)
+            plane.moving_down = bool(bits & DOWN)
+            plane.update(self.dt)
+
+    def _draw(self):
+        """Draw the interpolated world, our predicted plane and the scores."""
+        self.renderer.begin()
+        delay = self.settings.net_interpolation_delay
+        for net_id, (kind, x, y) in self.client.interpolated(delay).items():
+            position = (round(x), round(y))
+            if kind == ENEMY:
+                self.renderer.blit(self.enemy_image, position)
+            elif kind == BULLET:
+                self.renderer.fill(self.settings.bullet_colour,
+                                   pygame.Rect(position, self.bullet_size))
+            elif kind == POWERUP:
+                self.renderer.blit(self.powerup_image, position)
+            elif net_id != self.client.player:
+                self.renderer.blit(self.plane_image, position)
+        self.plane.blitme()
+        self.renderer.begin_hud()
+
+        if (self.score, self.lives) != (self.client.score, self.client.lives):
+            self.score, self.lives = self.client.score, self.client.lives
+            self.sb.prep_score()
+            self.sb.prep_lives()
+        self.sb.show_score()
+        self.sb.show_lives()
+        self.renderer.present()
+
+
+class BotClient(NetClient):
+    """A headless client that wanders, steers towards enemies and fires."""
+
+    def __init__(self, address, session, settings=None, seed=0):
+        super().__init__(address, session, settings)
+        self.random = random.Random(seed)
+        self.steps = 0
+
+    def step(self):
+        """Send one step of input and take in any snapshots."""
+        self.poll()
+        entities = self.entities()
+        me = entities.get(self.player)
+        bits = 0
+        if me is not None:
+            targets = [y for kind, x, y in entities.values() if kind == ENEMY and x > me[1]]
+            if targets:
+                target = min(targets, key=lambda y: abs(y - me[2]))
+                bits = DOWN if target > me[2] else UP
+            elif self.random.random() < 0.5:
+                bits = self.random.choice((UP, DOWN, LEFT, RIGHT))
+        self.steps += 1
+        self.send_input(bits, fire=self.steps % 6 == 0)
+
+
+def _serve_process(port, seconds, results):
+    """Run a server for seconds and put its address, then its stats, on results."""
+    server = GameServer(port=port)
+    results.put(server.address)
+    server.serve(seconds)
+    results.put(server.stats())
+
+
+def loadtest(sessions, seconds, port=0):
+    """Run a local server process against 2 bot clients per session.
+
+    Returns the server's tick cost and the clients' bandwidth figures.
+    """
+    import multiprocessing
+
+    results = multiprocessing.Queue()
+    # The server outlives the bots slightly so it reports on a full run
+    server = multiprocessing.Process(target=_serve_process, args=(port, seconds + 1.0, results))
+    server.start()
+    address = results.get(timeout=10)
+    settings = Settings()
+    bots = [BotClient(address, session, settings, seed=session * 2 + player)
+            for session in range(sessions) for player in range(2)]
+
+    counter = types.SimpleNamespace(late_ticks=0)
+    _run_fixed_rate(settings.sim_rate, seconds, lambda: [bot.step() for bot in bots], counter)
+    stats = results.get(timeout=seconds + 30)
+    server.join()
+
+    received = [bot.bytes_received for bot in bots]
+    stats['clients'] = len(bots)
+    stats['client_late_ticks'] = counter.late_ticks
+    stats['kbytes_per_second_per_client'] = statistics.fmean(received) / seconds / 1024
+    stats['bytes_per_snapshot'] = (sum(received)
+                                   / max(1, sum(bot.snapshots_received for bot in bots)))
+    stats['snapshots_dropped'] = sum(bot.snapshots_dropped for bot in bots)
+    for bot in bots:
+        bot.close()
+    return stats
+
+
+def main(argv=None):
+    import json
+
+    parser = argparse.ArgumentParser(description="Two-player FighterGame over UDP.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=5555)
+    serve.add_argument('--seed', type=int, default=0)
+    client = commands.add_parser('client')
+    client.add_argument('--host', default='127.0.0.1')
+    client.add_argument('--port', type=int, default=5555)
+    client.add_argument('--session', type=int, default=0)
+    load = commands.add_parser('loadtest')
+    load.add_argument('--sessions', type=int, default=10)
+    load.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'server':
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        server = GameServer(args.host, args.port, args.seed)
+        print(f"serving on {server.address[0]}:{server.address[1]}")
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            print(json.dumps(server.stats(), indent=2))
+    elif args.command == 'client':
+        ClientGame((args.host, args.port), args.session).run()
+    else:
+        print(json.dumps(loadtest(args.sessions, args.seconds), indent=2))
+
+
+if __name__ == '__main__':
+    main()
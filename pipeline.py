@@ -0,0 +1,206 @@
+"""Run the simulation and the drawing of FighterGame on separate threads.
+
+The simulation thread steps the game and, after each step, captures a
+RenderFrame: the surfaces to draw and where, which the game never
+changes afterwards. The main thread draws the newest frame it has been
+handed, so step N+1 is simulated while frame N is drawn. pygame
+releases the GIL inside blits, fills, scaling and display updates, so
+the two threads really do overlap.
+
+Input is still read on the main thread, as SDL requires, and passed to
+the simulation thread, which handles it before its next step. Frames
+carry the score and lives as numbers, and the main thread renders their
+text, so fonts are only ever used by the thread that draws. Frames
+are drawn as captured, at the latest step, without interpolation, and
+the frame profiler is not used.
+
+Set Settings.threaded_render to play this way, or compare the
+throughput of the two loops with:
+
+    python pipeline.py --frames 2000 mixed
+"""
+import argparse
+import queue
+import threading
+from time import perf_counter, sleep
+
+import pygame
+
+
+class Mailbox:
+    """A class to hand the newest frame from one thread to another.
+
+    A frame that is not taken before the next one is put is dropped.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None
+
+    def put(self, frame):
+        """Replace the waiting frame with frame."""
+        with self.lock:
+            self.frame = frame
+
+    def take(self):
+        """Return the waiting frame, or None if there is none."""
+        with self.lock:
+            frame, self.frame = self.frame, None
+        return frame
+
+
+class SimulationThread(threading.Thread):
+    """A thread to step the game in real time and publish a frame after each step."""
+
+    def __init__(self, fg_game, mailbox):
+        """Prepare to step fg_game, publishing frames to mailbox."""
+        super().__init__(name='simulation', daemon=True)
+        self.fg_game = fg_game
+        self.mailbox = mailbox
+        self.events = queue.SimpleQueue()
+        self.stopping = threading.Event()
+        self.error = None
+        self.steps = 0
+
+    def run(self):
+        try:
+            self._run()
+        except BaseException as error:
+            self.error = error
+
+    def _run(self):
+        fg_game = self.fg_game
+        settings = fg_game.settings
+        dt = fg_game.dt
+        accumulator = 0.0
+        previous = perf_counter()
+        while not self.stopping.is_set():
+            while not self.events.empty():
+                fg_game._handle_event(self.events.get())
+
+            now = perf_counter()
+            accumulator += min(now - previous, settings.max_frame_time)
+            previous = now
+            stepped = False
+            while accumulator >= dt:
+                fg_game._update_game()
+                accumulator -= dt
+                self.steps += 1
+                stepped = True
+            if stepped:
+                self.mailbox.put(fg_game._capture_frame())
+
+            # Build upcoming waves with the time left before the next step
+            fg_game.waves.prepare(perf_counter() + min(settings.wave_build_budget,
+                                                       max(0.0, dt - accumulator)))
+            wait = dt - accumulator - (perf_counter() - now)
+            if wait > 0:
+                sleep(wait)
+
+    def stop(self):
+        """Stop stepping and wait for the thread to finish."""
+        self.stopping.set()
+        self.join()
+
+
+def run_pipelined(fg_game):
+    """Play fg_game with the simulation on its own thread; never returns."""
+    settings = fg_game.settings
+    # The first frame and the work deferred after it happen before the
+    # simulation thread starts, since they touch the game state
+    fg_game._update_screen()
+    if fg_game.deferred:
+        fg_game._finish_startup()
+
+    mailbox = Mailbox()
+    simulation = SimulationThread(fg_game, mailbox)
+    simulation.start()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN
+                                             and event.key == pygame.K_ESCAPE):
+                simulation.stop()
+                fg_game._quit()
+            simulation.events.put(event)
+        if not simulation.is_alive():
+            raise RuntimeError("the simulation thread stopped") from simulation.error
+
+        now = perf_counter()
+        if fg_game.assets.finalize(now + settings.asset_finalize_budget):
+            fg_game.renderer.forget()
+        frame = mailbox.take()
+        if frame is not None:
+            fg_game._draw_frame(frame)
+            if fg_game.telemetry:
+                fg_game.telemetry.frame_time(perf_counter() - now)
+        fg_game.clock.tick(settings.max_fps)
+
+
+def measure(scenario, frames, seed, threaded):
+    """Simulate and draw every one of frames steps as fast as possible.
+
+    Returns the steps per second and the final score. Threaded runs hand
+    each frame over through a one-slot queue, so the simulation runs at
+    most one step ahead of the drawing and no frame is dropped.
+    """
+    from fighter_game import FighterGame
+
+    fg_game = FighterGame(headless=True, seed=seed)
+    fg_game.settings.dynamic_resolution = False
+    scenario.setup(fg_game)
+
+    def step():
+        scenario.refill(fg_game)
+        fg_game._update_game()
+        return fg_game._capture_frame()
+
+    start = perf_counter()
+    if not threaded:
+        for _ in range(frames):
+            fg_game._draw_frame(step())
+    else:
+        handoff = queue.Queue(maxsize=1)
+        errors = []
+
+        def simulate():
+            try:
+                for _ in range(frames):
+                    handoff.put(step())
+            except BaseException as error:
+                errors.append(error)
+                handoff.put(None)
+
+        simulation = threading.Thread(target=simulate, name='simulation', daemon=True)
+        simulation.start()
+        for _ in range(frames):
+            frame = handoff.get()
+            if frame is None:
+                raise errors[0]
+            fg_game._draw_frame(frame)
+        simulation.join()
+    elapsed = perf_counter() - start
+    return frames / elapsed, fg_game.score
+
+
+def main(argv=None):
+    from benchmark import SCENARIOS
+
+    parser = argparse.ArgumentParser(
+        description="Compare the serial and the threaded game loop.")
+    parser.add_argument('scenarios', nargs='*', default=['baseline', 'trees', 'mixed'],
+                        help="benchmark.py scenarios to run")
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    for name in args.scenarios:
+        serial, serial_score = measure(SCENARIOS[name], args.frames, args.seed, False)
+        threaded, threaded_score = measure(SCENARIOS[name], args.frames, args.seed, True)
+        if serial_score != threaded_score:
+            raise SystemExit(f"{name}: threaded score {threaded_score} != serial {serial_score}")
+        print(f"{name:10} serial {serial:7.0f} steps/s  threaded {threaded:7.0f} steps/s "
+              f"({(threaded / serial - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
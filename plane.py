@@ -1,20 +1,22 @@
-import pygame
-
 
 class Plane:
     """A class to manage to player sprite"""
 
-    def __init__(self, fg_game):
-        self.screen = fg_game.screen
-        self.screen_rect = fg_game.screen.get_rect()
+    def __init__(self, fg_game, lane=0):
+        self.renderer = fg_game.renderer
+        self.screen_rect = fg_game.screen_rect
         self.settings = fg_game.settings
 
         # Load the plane image and set its rectangle
-        self.image = pygame.image.load('images/fighter.bmp')
+        self.image = fg_game.assets.image(self.settings.plane_image)
+        self.mask = fg_game.assets.mask(self.settings.plane_image)
         self.rect = self.image.get_rect()
 
-        # Start the plane at the center left of the screen
+        # Start the plane at the center left of the screen, further planes
+        # each two plane heights lower
+        self.lane_offset = lane * 2 * self.rect.height
         self.rect.midleft = self.screen_rect.midleft
+        self.rect.y += self.lane_offset
 
         # Store a float of the planes exact position
         self.x = float(self.rect.x)
@@ -26,25 +28,41 @@ class Plane:
         self.moving_up = False
         self.moving_down = False
 
-    def update(self):
+        # Position before the last step, for interpolated drawing
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def update(self, dt):
+        """Move the plane for a step of dt seconds"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        distance = self.settings.plane_speed * dt
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.x += self.settings.plane_speed
+            self.x += distance
         if self.moving_left and self.rect.left > 0:
-            self.x -= self.settings.plane_speed
+            self.x -= distance
         if self.moving_up and self.rect.top > 0:
-            self.y -= self.settings.plane_speed
+            self.y -= distance
         if self.moving_down and self.rect.bottom < self.screen_rect.bottom:
-            self.y += self.settings.plane_speed
+            self.y += distance
         self.rect.x = self.x
         self.rect.y = self.y
 
-    def blitme(self):
-        """Draw the ship at its current location"""
-        self.screen.blit(self.image, self.rect)
+    def draw_rect(self, alpha=1.0):
+        """Return where to draw the ship, alpha of the way from its last position"""
+        rect = self.rect.copy()
+        if alpha < 1.0:
+            rect.x = self.prev_x + (self.x - self.prev_x) * alpha
+            rect.y = self.prev_y + (self.y - self.prev_y) * alpha
+        return rect
+
+    def blitme(self, alpha=1.0):
+        """Draw the ship alpha of the way from its last position to its current one"""
+        return self.renderer.blit(self.image, self.draw_rect(alpha))
 
     def center_plane(self):
         """Center the plane on the screen."""
-        self.rect.centery = self.screen_rect.centery
+        self.rect.centery = self.screen_rect.centery + self.lane_offset
         self.rect.x = 0
-        self.x = float(self.rect.x)
-        self.y = float(self.rect.y)
\ No newline at end of file
+        self.x = self.prev_x = float(self.rect.x)
+        self.y = self.prev_y = float(self.rect.y)
\ No newline at end of file
@@ -0,0 +1,54 @@
+class Pool:
+    """A class to recycle sprites instead of allocating new ones.
+
+    Objects handed out by acquire() are reset with its arguments and must
+    be given back with release() once they leave play. Each is stamped
+    with a spawn number, unique within the pool, so code tracking objects
+    across steps can tell a recycled one from the one it replaces.
+    """
+
+    def __init__(self, factory, size=0):
+        """Create the pool and preallocate size objects with factory."""
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self.in_use = 0
+        self.high_water = 0
+        self.spawns = 0
+        self.reserve(size)
+
+    def reserve(self, size):
+        """Preallocate objects until size are either free or in use."""
+        while self.created < size:
+            self.free.append(self.factory())
+            self.created += 1
+
+    def acquire(self, *args, **kwargs):
+        """Return a reset object, reusing a released one when possible."""
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+        else:
+            obj = self.factory(*args, **kwargs)
+            self.created += 1
+        self.spawns += 1
+        obj.spawn = self.spawns
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        """Take back an object that has left play."""
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def release_all(self, objs):
+        """Take back every object in objs."""
+        for obj in objs:
+            self.release(obj)
+
+    def report(self):
+        """Return the pool's usage figures for tuning its size."""
+        return {'in_use': self.in_use, 'free': len(self.free),
+                'high_water': self.high_water, 'created': self.created}
@@ -1,39 +1,40 @@
-import pygame
 from pygame.sprite import Sprite
-import random
+
+# Every kind of power-up, in a fixed order for snapshots
+POWERUP_TYPES = ('extra_life',)
 
 class PowerUp(Sprite):
     """A class to represent a power-up."""
 
-    def __init__(self, fg_game, powerup_type):
+    def __init__(self, fg_game, powerup_type='extra_life'):
         """Initialize the power-up."""
         super().__init__()
-        self.screen = fg_game.screen
         self.settings = fg_game.settings
-        self.powerup_type = powerup_type
+        self.screen_rect = fg_game.screen_rect
+        self.random = fg_game.random
 
-        # Font settings for power-up
-        self.font = pygame.font.SysFont(None, 48)
+        # The rendered letter and its mask are shared by every power-up
         self.color = (255, 0, 0)
         self.text = 'L'
 
         # Create a rect for the power-up
-        self.image = self.font.render(self.text, True, self.color)
+        self.image = fg_game.text.render(self.text, 48, self.color)
         self.rect = self.image.get_rect()
+        self.mask = fg_game.text.mask(self.text, 48, self.color)
+        self.reset(powerup_type)
+
+    def reset(self, powerup_type):
+        """Give the power-up a type and a new random position."""
+        self.powerup_type = powerup_type
 
         # Start each new power-up at a random position near the enemy's position
-        self.rect.x = random.randint(fg_game.screen_rect.left + self.rect.width, fg_game.screen_rect.right - self.rect.width)
-        self.rect.y = random.randint(fg_game.screen_rect.top + self.rect.height, fg_game.screen_rect.bottom - self.rect.height)
+        self.rect.x = self.random.randint(self.screen_rect.left + self.rect.width, self.screen_rect.right - self.rect.width)
+        self.rect.y = self.random.randint(self.screen_rect.top + self.rect.height, self.screen_rect.bottom - self.rect.height)
 
         # Store the power-up's exact position
         self.x = float(self.rect.x)
 
-    def update(self):
-        """Move the power-up to the left."""
-        self.x -= self.settings.powerup_speed
+    def update(self, dt):
+        """Move the power-up to the left for a step of dt seconds."""
+        self.x -= self.settings.powerup_speed * dt
         self.rect.x = self.x
-
-    def draw_powerup(self):
-        """Draw the power-up at its current location."""
-        self.image = self.font.render(self.text, True, self.color)
-        self.screen.blit(self.image, self.rect)
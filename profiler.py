@@ -0,0 +1,184 @@
+import gc
+from collections import deque
+from time import perf_counter
+
+# The phases of run_game, in the order they run each frame
+PHASES = (
+    '_check_events',
+    '_finalize_assets',
+    'plane.update',
+    '_maybe_spawn_fleet',
+    '_update_enemies',
+    '_update_bullets',
+    '_update_powerups',
+    '_update_trees',
+    '_check_collisions',
+    '_record_step',
+    '_update_screen',
+    '_prepare_waves',
+)
+
+GROUPS = ('enemies', 'bullets', 'powerups', 'trees')
+
+
+class FrameProfiler:
+    """A class to time each phase of every frame into a ring buffer.
+
+    Phases that run once per simulation step are summed over the steps of
+    a frame. GC pauses are timed through gc.callbacks once the first
+    frame has begun; laps outside a frame are ignored.
+    """
+
+    def __init__(self, fg_game):
+        """Initialize the ring buffer."""
+        self.fg_game = fg_game
+        self.settings = fg_game.settings
+        self.frames = deque(maxlen=self.settings.profile_buffer_size)
+        self.current = None
+        self.frame_start = 0.0
+        self.last = 0.0
+
+        # GC activity within the current frame
+        self.gc_start = 0.0
+        self.gc_collections = 0
+        self.gc_time = 0.0
+        self.gc_hooked = False
+
+        # Overlay state, redrawn a few times a second rather than every frame
+        self.show_overlay = False
+        self.overlay_images = []
+        self.overlay_age = 0
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        if not self.gc_hooked:
+            gc.callbacks.append(self._on_gc)
+            self.gc_hooked = True
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.gc_collections = 0
+        self.gc_time = 0.0
+        self.frame_start = self.last = perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the last lap to phase."""
+        if self.current is None:
+            return
+        now = perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """Store the finished frame in the ring buffer."""
+        if self.current is None:
+            return
+        row = {'frame': self.fg_game.frame,
+               'fps': self.fg_game.clock.get_fps(),
+               'frame_ms': (perf_counter() - self.frame_start) * 1000,
+               'render_scale': self.fg_game.renderer.scale}
+        for phase, seconds in self.current.items():
+            row[phase] = seconds * 1000
+        for name in GROUPS:
+            row[name] = len(getattr(self.fg_game, name))
+        row['gc_collections'] = self.gc_collections
+        row['gc_ms'] = self.gc_time * 1000
+        self.frames.append(row)
+        self.current = None
+
+    def _on_gc(self, phase, info):
+        """Count collections and time their pauses."""
+        if phase == 'start':
+            self.gc_start = perf_counter()
+        else:
+            self.gc_collections += 1
+            self.gc_time += perf_counter() - self.gc_start
+
+    def summary(self, count=120):
+        """Return the average of each column over the last count frames."""
+        rows = list(self.frames)[-count:]
+        if not rows:
+            return {}
+        return {key: sum(row[key] for row in rows) / len(rows) for key in rows[0]}
+
+    def toggle_overlay(self):
+        """Show or hide the in-game overlay."""
+        self.show_overlay = not self.show_overlay
+        self.overlay_age = 0
+
+    def draw_overlay(self, renderer):
+        """Draw per-phase timings, FPS, entity counts and GC activity."""
+        if self.overlay_age <= 0:
+            self.overlay_images = self._render_overlay()
+            self.overlay_age = self.settings.profile_overlay_interval
+        self.overlay_age -= 1
+
+        top = 10
+        right = self.fg_game.screen_rect.right - 10
+        for image in self.overlay_images:
+            rect = image.get_rect(topright=(right, top))
+            renderer.blit(image, rect)
+            top = rect.bottom
+
+    def _render_overlay(self):
+        """Render the overlay text lines."""
+        stats = self.summary()
+        if not stats:
+            return []
+        font = self.fg_game.assets.font(None, 24)
+        lines = [f"{stats['fps']:6.1f} fps  {stats['frame_ms']:6.2f} ms  "
+                 f"scale {stats['render_scale']:.2f}"]
+        lines += [f"{phase} {stats[phase]:6.2f} ms" for phase in PHASES]
+        lines.append("  ".join(f"{name} {stats[name]:.0f}" for name in GROUPS))
+        lines.append(f"gc {stats['gc_collections']:.2f}/frame  {stats['gc_ms']:.3f} ms")
+        return [font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in lines]
+
+    def dump(self, path):
+        """Write the ring buffer to path as CSV, or JSON for a .json path."""
+        import csv
+        import json
+
+        rows = list(self.frames)
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.json'):
+                json.dump(rows, f, indent=1)
+            elif rows:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+
+    def close(self):
+        """Unhook from the garbage collector."""
+        if self.gc_hooked:
+            gc.callbacks.remove(self._on_gc)
+            self.gc_hooked = False
+
+
+class StartupTrace:
+    """A class to time each stage of startup up to the first frame.
+
+    Stages are charged the time since the previous mark. The module
+    imports, timed separately, only count towards the first game created
+    in a process.
+    """
+
+    def __init__(self, imports=0.0):
+        """Start the trace, with imports seconds already spent importing."""
+        self.stages = {'imports': imports * 1000} if imports else {}
+        self.last = perf_counter()
+        self.first_frame_ms = None
+
+    def mark(self, stage):
+        """Charge the time since the last mark to stage."""
+        now = perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last) * 1000
+        self.last = now
+
+    def total(self):
+        """Return the milliseconds traced so far."""
+        return sum(self.stages.values())
+
+    def report(self):
+        """Return the stages and time-to-first-frame as text."""
+        lines = [f"{stage:12} {ms:8.2f} ms" for stage, ms in self.stages.items()]
+        if self.first_frame_ms is not None:
+            lines.append(f"{'first frame':12} {self.first_frame_ms:8.2f} ms after start")
+        return "\n".join(lines)
@@ -0,0 +1,240 @@
+from collections import namedtuple
+from time import perf_counter
+
+import pygame
+
+# Everything needed to draw one frame, captured from the game state so it
+# can be drawn while the game moves on: (image, position) pairs for the
+# sprites, rects for the bullets, the terrain scroll position and the
+# (score, lives, game over) shown by the HUD, rendered when drawn
+RenderFrame = namedtuple('RenderFrame', (
+    'step', 'terrain', 'trees', 'bullets', 'powerups', 'planes', 'enemies',
+    'hud', 'game_over', 'overlay'))
+
+
+class Renderer:
+    """A class to draw each frame and push it to the display.
+
+    In 'full' mode every frame starts from a filled screen and ends with
+    display.flip(). In 'dirty' mode only the rects drawn last frame are
+    erased and only those plus this frame's rects are pushed with
+    display.update(), falling back to a full frame when the dirty area
+    grows past Settings.dirty_area_limit of the screen.
+
+    With Settings.dynamic_resolution on, the world is drawn at scale times
+    the screen size into an off-screen surface and scaled up onto the
+    screen by begin_hud(), after which the HUD draws at full resolution.
+    adapt() lowers the scale while drawing a frame takes more than its
+    share of the frame budget and raises it again once there is room.
+    Callers keep using screen coordinates throughout; only the surface
+    behind them shrinks.
+    """
+
+    def __init__(self, fg_game):
+        """Initialize the renderer for the game's screen."""
+        self.screen = fg_game.screen
+        self.settings = fg_game.settings
+        self.bg_colour = self.settings.bg_colour
+        self.mode = self.settings.render_mode
+        self.screen_area = self.screen.get_width() * self.screen.get_height()
+
+        # Rects drawn this frame and last frame
+        self.dirty = []
+        self.previous = []
+        self.full_frame = True
+        self.needs_full_frame = True
+
+        # Frame counts for each path, for benchmarking
+        self.full_frames = 0
+        self.dirty_frames = 0
+
+        # Dynamic resolution: the world surface, sprites resized for it,
+        # the smoothed time to draw a frame, frames left before the next
+        # change and the (scale, time) before the last step down
+        self.target = self.screen
+        self.scale = 1.0
+        self.world = None
+        self.scaled = {}
+        self.budget = self._frame_budget()
+        self.frame_start = 0.0
+        self.render_time = None
+        self.hold = self.settings.resolution_hold
+        self.dropped_from = None
+
+    def _frame_budget(self):
+        """Return the time one frame may take: a refresh of the display.
+
+        max_fps only caps how often frames are drawn, so it lowers the
+        rate but never shortens the budget below what the display shows.
+        """
+        # pygame-ce can tell; otherwise (and under the dummy driver) assume
+        get_rate = getattr(pygame.display, 'get_current_refresh_rate', None)
+        rate = 0
+        if get_rate is not None:
+            try:
+                rate = get_rate()
+            except pygame.error:
+                rate = 0
+        rate = rate or self.settings.refresh_rate
+        if self.settings.max_fps:
+            rate = min(rate, self.settings.max_fps)
+        return 1 / rate
+
+    def invalidate(self):
+        """Force the next frame to redraw and flip the whole screen."""
+        self.needs_full_frame = True
+
+    def begin(self, background=None):
+        """Clear the screen, or just last frame's rects, for a new frame.
+
+        background, if given, is a sequence of (image, position) pairs
+        that paints the whole screen in place of the fill; it makes the
+        frame a full one.
+        """
+        self.frame_start = perf_counter()
+        # The scaled world is stretched over the whole screen every frame
+        self.target = self.world if self.world is not None else self.screen
+        self.full_frame = (self.mode != 'dirty' or self.needs_full_frame
+                           or background is not None or self.world is not None
+                           or self._area(self.previous) > self._area_limit())
+        if background is not None:
+            self.target.blits(self._to_world(background), False)
+        elif self.full_frame:
+            self.target.fill(self.bg_colour)
+        else:
+            for rect in self.previous:
+                self.screen.fill(self.bg_colour, rect)
+
+    def begin_hud(self):
+        """Put the world on the screen; what follows is drawn at full resolution."""
+        if self.target is not self.screen:
+            pygame.transform.scale(self.world, self.screen.get_size(), self.screen)
+            self.target = self.screen
+
+    def blit(self, image, rect):
+        """Draw image at rect and record the area drawn."""
+        if self.target is not self.screen:
+            image, rect = self._sprite(image), (rect[0] * self.scale, rect[1] * self.scale)
+        drawn = self.target.blit(image, rect)
+        self.dirty.append(drawn)
+        return drawn
+
+    def blits(self, sequence):
+        """Draw a sequence of (image, rect) pairs and record the areas drawn."""
+        if self.target is not self.screen:
+            sequence = self._to_world(sequence)
+        drawn = self.target.blits(sequence)
+        self.dirty.extend(drawn)
+        return drawn
+
+    def fill(self, colour, rect):
+        """Fill rect with colour and record the area drawn."""
+        if self.target is not self.screen:
+            scale = self.scale
+            rect = pygame.Rect(rect[0] * scale, rect[1] * scale,
+                               max(1, rect[2] * scale), max(1, rect[3] * scale))
+        drawn = self.target.fill(colour, rect)
+        self.dirty.append(drawn)
+        return drawn
+
+    def _sprite(self, image):
+        """Return image resized to the world scale, resizing it only once."""
+        resized = self.scaled.get(image)
+        if resized is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            resized = pygame.transform.smoothscale(image, size)
+            self.scaled[image] = resized
+        return resized
+
+    def _to_world(self, sequence):
+        """Return (image, position) pairs moved onto the world surface."""
+        if self.world is None:
+            return sequence
+        scale = self.scale
+        return [(self._sprite(image), (rect[0] * scale, rect[1] * scale))
+                for image, rect in sequence]
+
+    def forget(self, image=None):
+        """Drop the resized copy of an image redrawn in place, or of every image."""
+        if image is None:
+            self.scaled.clear()
+        else:
+            self.scaled.pop(image, None)
+
+    def set_scale(self, scale):
+        """Draw the world at scale times the screen size from the next frame."""
+        if scale == self.scale:
+            return
+        self.scale = scale
+        self.scaled.clear()
+        if scale >= 1.0:
+            self.world = None
+        else:
+            width, height = self.screen.get_size()
+            self.world = pygame.Surface((round(width * scale), round(height * scale))).convert()
+        self.invalidate()
+
+    def adapt(self, render_time):
+        """Move the render scale a step towards keeping render_time in budget.
+
+        A smaller world costs less to draw but more to scale up, so a
+        step down that does not make frames faster is taken back.
+        """
+        settings = self.settings
+        # A moving average, so single slow frames do not change the scale
+        if self.render_time is None:
+            self.render_time = render_time
+        self.render_time += (render_time - self.render_time) * 0.1
+        if self.hold > 0:
+            self.hold -= 1
+            return
+        if self.dropped_from is not None:
+            scale, before = self.dropped_from
+            self.dropped_from = None
+            if self.render_time > before * 0.9:
+                self.set_scale(scale)
+                self.hold = settings.resolution_hold * 10
+                return
+
+        target = settings.resolution_target * self.budget
+        if self.render_time > target and self.scale > settings.resolution_min_scale:
+            scale = max(settings.resolution_min_scale, self.scale - settings.resolution_step)
+            self.dropped_from = (self.scale, self.render_time)
+        elif self.scale < 1.0:
+            scale = min(1.0, self.scale + settings.resolution_step)
+            # Only go up if the larger world, costing its area, stays well in budget
+            if self.render_time * (scale / self.scale) ** 2 > target * 0.8:
+                return
+        else:
+            return
+        self.set_scale(scale)
+        self.hold = settings.resolution_hold
+
+    def present(self):
+        """Push the frame to the display."""
+        if not self.full_frame:
+            rects = self.previous + self.dirty
+            if self._area(rects) > self._area_limit():
+                self.full_frame = True
+            else:
+                pygame.display.update(rects)
+                self.dirty_frames += 1
+        if self.full_frame:
+            pygame.display.flip()
+            self.full_frames += 1
+
+        self.previous = self.dirty
+        self.dirty = []
+        self.needs_full_frame = False
+        if self.settings.dynamic_resolution:
+            self.adapt(perf_counter() - self.frame_start)
+
+    def _area_limit(self):
+        """Return the dirty area above which a full frame is cheaper."""
+        return self.settings.dirty_area_limit * self.screen_area
+
+    @staticmethod
+    def _area(rects):
+        """Return the summed area of rects, counting overlaps twice."""
+        return sum(rect.width * rect.height for rect in rects)
@@ -0,0 +1,235 @@
+"""Record and replay FighterGame input streams.
+
+A recording holds the RNG seed, the settings that change how the game
+plays (terrain, pixel collisions, the simulation rate and the wave
+script itself) and every input event tagged with the simulation step it
+was handled before, so replaying it headlessly reproduces the session
+exactly.
+
+    python fighter_game.py --record session.fgr
+    python replay.py session.fgr            # replay and verify score and lives
+    python replay.py session.fgr --seek 600 # stop at step 600
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+from time import perf_counter
+
+import pygame
+
+MAGIC = b'FGRP'
+VERSION = 4
+HEADER = struct.Struct('<4sHQ')
+# terrain, pixel_collisions and sim_rate, then the wave script's length
+# as a varint (0 for random fleets) and its bytes
+SETTINGS = struct.Struct('<??H')
+
+# Event codes in the stream; END closes it and is followed by the trailer
+END, KEYDOWN, KEYUP, CLICK = range(4)
+
+
+class ReplayMismatch(Exception):
+    """Raised when a replay does not reproduce the recorded result."""
+
+
+def write_varint(out, value):
+    """Append value to out as an unsigned LEB128 varint."""
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def read_varint(data, offset):
+    """Return the varint at offset and the offset just past it."""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class InputRecorder:
+    """A class to capture the input events handled by a game."""
+
+    def __init__(self, seed, settings):
+        """Start an empty recording for a game seeded with seed and played with settings."""
+        self.seed = seed
+        self.settings = bytearray(SETTINGS.pack(settings.terrain, settings.pixel_collisions,
+                                                settings.sim_rate))
+        waves = b''
+        if settings.wave_file:
+            with open(settings.wave_file, 'rb') as f:
+                waves = f.read()
+        write_varint(self.settings, len(waves))
+        self.settings += waves
+        self.stream = bytearray()
+        self.last_frame = 0
+
+    def record(self, frame, event):
+        """Append event, handled before simulation step frame."""
+        if event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_ESCAPE, pygame.K_F5, pygame.K_F9):
+                return
+            code, values = KEYDOWN, (event.key,)
+        elif event.type == pygame.KEYUP:
+            code, values = KEYUP, (event.key,)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            code, values = CLICK, event.pos
+        else:
+            return
+        write_varint(self.stream, frame - self.last_frame)
+        self.stream.append(code)
+        for value in values:
+            write_varint(self.stream, value)
+        self.last_frame = frame
+
+    def save(self, path, fg_game):
+        """Write the recording and the game's final state to path."""
+        trailer = bytearray()
+        for value in (fg_game.frame, fg_game.score, fg_game.lives):
+            write_varint(trailer, value)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed))
+            f.write(self.settings)
+            f.write(self.stream)
+            f.write(bytes([0, END]))
+            f.write(trailer)
+
+
+class Recording:
+    """A class to hold a decoded recording."""
+
+    def __init__(self, seed, events, frames, score, lives, terrain=True,
+                 pixel_collisions=False, sim_rate=120, waves=None):
+        self.seed = seed
+        self.terrain = terrain
+        self.pixel_collisions = pixel_collisions
+        self.sim_rate = sim_rate
+        # The wave script's JSON, or None for random fleets
+        self.waves = waves
+        self.events = events
+        self.frames = frames
+        self.score = score
+        self.lives = lives
+
+    @classmethod
+    def load(cls, path):
+        """Read a recording written by InputRecorder.save."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+
+        terrain, pixel_collisions, sim_rate = SETTINGS.unpack_from(data, HEADER.size)
+        length, offset = read_varint(data, HEADER.size + SETTINGS.size)
+        waves = data[offset:offset + length] if length else None
+        offset += length
+
+        events = {}
+        frame = 0
+        while True:
+            delta, offset = read_varint(data, offset)
+            code = data[offset]
+            offset += 1
+            frame += delta
+            if code == END:
+                break
+            if code == CLICK:
+                x, offset = read_varint(data, offset)
+                y, offset = read_varint(data, offset)
+                event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y), button=1)
+            else:
+                key, offset = read_varint(data, offset)
+                event_type = pygame.KEYDOWN if code == KEYDOWN else pygame.KEYUP
+                event = pygame.event.Event(event_type, key=key)
+            events.setdefault(frame, []).append(event)
+
+        frames, offset = read_varint(data, offset)
+        score, offset = read_varint(data, offset)
+        lives, offset = read_varint(data, offset)
+        return cls(seed, events, frames, score, lives, terrain, pixel_collisions, sim_rate, waves)
+
+    def settings(self, wave_file=None):
+        """Return Settings as recorded; the wave script, if any, must be saved at wave_file."""
+        from settings import Settings
+
+        settings = Settings()
+        settings.terrain = self.terrain
+        settings.pixel_collisions = self.pixel_collisions
+        settings.sim_rate = self.sim_rate
+        settings.wave_file = wave_file
+        return settings
+
+    def __call__(self, fg_game):
+        """Return the events to handle before the game's next step."""
+        return self.events.get(fg_game.frame, ())
+
+
+def replay(recording, seek=None):
+    """Run a recording headlessly up to step seek (default: the end).
+
+    Returns the game, paused at that step, so it can be inspected or
+    stepped further with run_headless.
+    """
+    from fighter_game import FighterGame
+
+    # The wave script is read when the game is created, so it only needs
+    # to be on disk until then
+    with tempfile.TemporaryDirectory() as folder:
+        wave_file = None
+        if recording.waves is not None:
+            wave_file = os.path.join(folder, 'waves.json')
+            with open(wave_file, 'wb') as f:
+                f.write(recording.waves)
+        fg_game = FighterGame(headless=True, seed=recording.seed,
+                              settings=recording.settings(wave_file))
+    frames = recording.frames if seek is None else min(seek, recording.frames)
+    fg_game.run_headless(max_frames=frames, script=recording, until_game_over=False)
+    return fg_game
+
+
+def verify(recording):
+    """Replay to the end and raise ReplayMismatch if the result differs."""
+    fg_game = replay(recording)
+    if (fg_game.frame, fg_game.score, fg_game.lives) != (
+            recording.frames, recording.score, recording.lives):
+        raise ReplayMismatch(
+            f"expected step {recording.frames} score {recording.score} lives {recording.lives}, "
+            f"got step {fg_game.frame} score {fg_game.score} lives {fg_game.lives}")
+    return fg_game
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a FighterGame recording.")
+    parser.add_argument('path')
+    parser.add_argument('--seek', type=int, help="stop at this simulation step")
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.path)
+    start = perf_counter()
+    try:
+        if args.seek is None:
+            fg_game = verify(recording)
+        else:
+            fg_game = replay(recording, args.seek)
+    except ReplayMismatch as error:
+        print(f"Replay mismatch: {error}")
+        sys.exit(1)
+    elapsed = perf_counter() - start
+    print(f"step {fg_game.frame}: score {fg_game.score}, lives {fg_game.lives} "
+          f"({fg_game.frame / elapsed:.0f} steps/s, {elapsed:.2f} s)")
+
+
+if __name__ == '__main__':
+    main()
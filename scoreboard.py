@@ -1,28 +1,47 @@
-import pygame
-
 class Scoreboard:
-    """A class to report scoring information."""
+    """A class to report scoring information.
+
+    The game only changes the numbers; hud_blits() re-renders the images
+    whose number changed, on whichever thread draws the frame.
+    """
 
     def __init__(self, fg_game):
         """Initialize scorekeeping attributes."""
         self.fg_game = fg_game
-        self.screen = fg_game.screen
-        self.screen_rect = self.screen.get_rect()
+        self.renderer = fg_game.renderer
+        self.screen_rect = fg_game.screen_rect
         self.settings = fg_game.settings
         self.stats = fg_game
+        self.text = fg_game.text
 
         # Font settings for scoring information
         self.text_color = (30, 30, 30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font_size = 48
 
         # Prepare the initial score image
+        self.final_score_value = None
         self.prep_score()
         self.prep_lives()
 
-    def prep_score(self):
-        """Turn the score into a rendered image."""
-        score_str = str(self.stats.score)
-        self.score_image = self.font.render(score_str, True, self.text_color, self.settings.bg_colour)
+    def hud_blits(self, score, lives, game_over):
+        """Return the (image, position) pairs of the HUD, with the final score if game_over."""
+        if score != self.score_value:
+            self.prep_score(score)
+        if lives != self.lives_value:
+            self.prep_lives(lives)
+        hud = [(self.score_image, self.score_rect.topleft),
+               (self.lives_image, self.lives_rect.topleft)]
+        if game_over:
+            if score != self.final_score_value:
+                self.prep_final_score(score)
+            hud.append((self.final_score_image, self.final_score_rect.topleft))
+        return hud
+
+    def prep_score(self, score=None):
+        """Turn the score (the game's by default) into a rendered image."""
+        self.score_value = self.stats.score if score is None else score
+        self.score_image = self.text.number(
+            self.score_value, self.font_size, self.text_color, self.settings.bg_colour)
 
         # Display the score at the top left of the screen
         self.score_rect = self.score_image.get_rect()
@@ -31,12 +50,14 @@ class Scoreboard:
 
     def show_score(self):
         """Draw score to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
+        self.renderer.blit(self.score_image, self.score_rect)
 
-    def prep_lives(self):
-        """Turn the lives into a rendered image."""
-        lives_str = f"Lives: {self.stats.lives}"
-        self.lives_image = self.font.render(lives_str, True, self.text_color, self.settings.bg_colour)
+    def prep_lives(self, lives=None):
+        """Turn the lives (the game's by default) into a rendered image."""
+        self.lives_value = self.stats.lives if lives is None else lives
+        self.lives_image = self.text.number(
+            self.lives_value, self.font_size, self.text_color, self.settings.bg_colour,
+            prefix="Lives: ")
 
         # Display the lives at the top left of the screen below the score
         self.lives_rect = self.lives_image.get_rect()
@@ -45,14 +66,15 @@ class Scoreboard:
 
     def show_lives(self):
         """Draw lives to the screen."""
-        self.screen.blit(self.lives_image, self.lives_rect)
+        self.renderer.blit(self.lives_image, self.lives_rect)
 
-    def show_final_score(self):
-        """Draw the final score to the center of the screen."""
-        final_score_str = f"Final Score: {self.stats.score}"
-        self.final_score_image = self.font.render(final_score_str, True, self.text_color, self.settings.bg_colour)
+    def prep_final_score(self, score=None):
+        """Turn the final score (the game's by default) into a rendered image."""
+        self.final_score_value = self.stats.score if score is None else score
+        self.final_score_image = self.text.number(
+            self.final_score_value, self.font_size, self.text_color, self.settings.bg_colour,
+            prefix="Final Score: ")
 
         # Center the final score on the screen
         self.final_score_rect = self.final_score_image.get_rect()
         self.final_score_rect.center = self.screen_rect.center
-        self.screen.blit(self.final_score_image, self.final_score_rect)
@@ -7,19 +7,149 @@ class Settings:
         self.screen_height = 1000
         self.bg_colour = (0, 150, 50)
 
-        self.plane_speed = 5.0
+        # Timing: the simulation advances in fixed steps of 1 / sim_rate
+        # seconds, rendering runs up to max_fps (0 for uncapped), draws
+        # sprites between their last two steps when interpolate is on and
+        # skips at most max_frame_skip renders in a row when falling behind
+        self.sim_rate = 120
+        self.max_fps = 240
+        self.max_frame_time = 0.25
+        self.max_frame_skip = 4
+        self.interpolate = True
+        # Simulate on a thread of its own while the main thread draws
+        # (see pipeline.py)
+        self.threaded_render = False
+
+        # Rendering: 'full' redraws and flips every frame, 'dirty' only
+        # pushes changed rects until they cover dirty_area_limit of the
+        # screen. The scrolling terrain changes the whole screen every
+        # frame, so 'dirty' only pays off with terrain off
+        self.render_mode = 'full'
+        self.dirty_area_limit = 0.5
+        # Dynamic resolution: while drawing takes more than resolution_target
+        # of a frame at the display's refresh rate (refresh_rate when pygame
+        # cannot tell, and never more often than max_fps) the world is drawn
+        # resolution_step smaller, down to resolution_min_scale of the
+        # screen, waiting resolution_hold frames between changes; the HUD
+        # stays sharp. Scaling up by exactly 2 is much cheaper than by other
+        # factors
+        self.dynamic_resolution = True
+        self.refresh_rate = 60
+        self.resolution_target = 0.5
+        self.resolution_min_scale = 0.5
+        self.resolution_step = 0.5
+        self.resolution_hold = 30
+
+        # Frame profiler: frames kept in the ring buffer, frames between
+        # overlay refreshes and the CSV/JSON file written on exit, if any
+        self.profile_buffer_size = 600
+        self.profile_overlay_interval = 30
+        self.profile_dump = None
+        # Print time-to-first-frame broken down by startup stage
+        self.startup_trace = False
+        # Print the asset, text, pool and telemetry reports on exit
+        self.print_stats = False
+
+        # Input recording written on exit, set by FighterGame.start_recording
+        self.record_path = None
+
+        # World snapshots (snapshot.py): steps kept for rollback (0 to take
+        # none) and the file written by quick-save (F5) and read by
+        # quick-load (F9)
+        self.rollback_frames = 0
+        self.quicksave_path = 'quicksave.fgs'
+
+        # Telemetry (telemetry.py), off unless asked for: events are appended
+        # to telemetry_log and finished games kept in the leaderboard_db
+        # SQLite file by a writer thread, in batches of up to telemetry_batch
+        # events gathered for at most telemetry_flush_interval seconds.
+        # Events that find telemetry_queue_size already waiting are dropped.
+        # Frame times are summarized every telemetry_summary_interval seconds
+        self.telemetry = False
+        self.telemetry_log = 'telemetry.jsonl'
+        self.leaderboard_db = 'leaderboard.db'
+        self.telemetry_queue_size = 1024
+        self.telemetry_batch = 256
+        self.telemetry_flush_interval = 1.0
+        self.telemetry_summary_interval = 5.0
+        self.player_name = 'Player'
+
+        # Network play (net.py): simulation steps between snapshots, steps
+        # of snapshots kept as delta bases, seconds before a silent client
+        # is dropped, how far behind the server clients draw others, the
+        # most sessions a server hosts and seconds a finished game is shown
+        # before it starts again
+        self.net_snapshot_interval = 4
+        self.net_history = 120
+        self.net_timeout = 5.0
+        self.net_interpolation_delay = 0.1
+        self.net_max_sessions = 32
+        self.net_game_over_delay = 3.0
+
+        # Keep sprite positions in NumPy arrays and update them in bulk
+        self.entity_store = True
+
+        # Collision settings: grid cell size and pixel-accurate narrow phase
+        self.collision_cell_size = 128
+        # Groups smaller than this are checked directly, without a grid
+        self.collision_grid_min = 32
+        self.pixel_collisions = False
+
+        # Image settings
+        self.plane_image = 'images/fighter.bmp'
+        self.enemy_image = 'images/enemy1.bmp'
+        self.trees_folder = 'images/trees/'
+        # Packed images built by assets.py, used instead of the loose
+        # files when it exists
+        self.asset_bundle = 'images/assets.bundle'
+        # Decode loose images on asset_workers threads, showing placeholders
+        # until they arrive, and finalize them for at most
+        # asset_finalize_budget seconds per frame (never when headless)
+        self.async_assets = True
+        self.asset_workers = 2
+        self.asset_finalize_budget = 0.002
+
+        # Text settings: rendered strings kept by the text cache
+        self.text_cache_size = 64
+
+        # Speeds are in pixels per second
+        self.plane_speed = 600.0
 
         # Bullet settings
         self.bullet_width = 15
         self.bullet_height = 6
         self.bullet_colour = (60, 60, 60)
-        self.bullet_speed = 15
+        self.bullet_speed = 1800.0
         self.bullets_allowed = 10
 
         #Enemy settings
-        self.enemy_speed = 2.0
+        self.enemy_speed = 240.0
+        # Milliseconds between random fleet spawns
+        self.fleet_spawn_min = 1500
+        self.fleet_spawn_max = 5000
+        # Scripted waves to play instead of random fleets (see waves.py),
+        # how many upcoming waves are built ahead and the most time per
+        # frame spent building them, in seconds
+        self.wave_file = None
+        self.wave_lookahead = 2
+        self.wave_build_budget = 0.002
 
         #power up settings
         self.powerup_drop_chance = 1
-        self.powerup_speed = 1
+        self.powerup_speed = 120.0
+
+        # Background settings: with terrain on, trees are baked into
+        # scrolling chunks (as wide as the screen when terrain_chunk_width
+        # is None) at terrain_density trees per screen width, otherwise
+        # each tree is a sprite
+        self.tree_speed = 144.0
+        self.terrain = True
+        self.terrain_chunk_width = None
+        self.terrain_density = 20
+
+        # Sprites preallocated by each object pool
+        self.bullet_pool_size = self.bullets_allowed
+        self.enemy_pool_size = 24
+        self.powerup_pool_size = 8
+        self.tree_pool_size = 24
 
@@ -0,0 +1,326 @@
+"""Capture and restore the whole FighterGame world as a compact binary buffer.
+
+A snapshot holds everything the next simulation step depends on: the
+seed and RNG state, score, lives, kills and the game state flags, the
+planes, every enemy, bullet, power-up and tree, the wave timeline and
+the terrain scroll. Restoring one into a game with the same settings
+continues exactly as the original did.
+
+Most of a snapshot is the RNG's Mersenne Twister state (2.5 KB); each
+sprite adds 17 to 25 bytes.
+
+    data = snapshot.capture(fg_game)
+    snapshot.restore(fg_game, data)
+"""
+import random
+import struct
+from array import array
+from collections import deque
+
+from powerup import POWERUP_TYPES
+
+MAGIC = b'FGSS'
+VERSION = 1
+HEADER = struct.Struct('<4sHQ')
+
+# Step, score, lives, kills, game_active, game_over
+STATE = struct.Struct('<QIiI??')
+# The game's random.Random state: version, 625 words and the cached gauss value
+RNG = struct.Struct('<I?d')
+RNG_WORDS = 625
+# Planes, enemies, bullets, power-ups, trees and scheduled waves
+COUNTS = struct.Struct('<BIIIII')
+
+# x, y and the four movement flags
+PLANE = struct.Struct('<dd????')
+# Exact x (and y), the whole-pixel top left, and direction, plane or type
+ENEMY = struct.Struct('<ddiib')
+BULLET = struct.Struct('<diiB')
+POWERUP = struct.Struct('<diiB')
+TREE = struct.Struct('<diiH')
+
+# Terrain on, leftmost chunk, its left edge now and at the last step
+TERRAIN = struct.Struct('<?qdd')
+# Next timeline order number, index of WaveFile.last (NO_WAVE for none)
+TIMELINE = struct.Struct('<QI')
+NO_WAVE = 0xFFFFFFFF
+# Due tick, order number, direction and number of positions
+WAVE = struct.Struct('<qQbH')
+POSITION = struct.Struct('<dd')
+
+# Everything before the sprites
+PREFIX_SIZE = HEADER.size + STATE.size + RNG.size + RNG_WORDS * 4 + COUNTS.size
+
+
+def capture(fg_game):
+    """Return the game's world state as bytes."""
+    version, words, gauss = fg_game.random.getstate()
+    planes, enemies = fg_game.planes, fg_game.enemies
+    bullets, powerups, trees = fg_game.bullets, fg_game.powerups, fg_game.trees
+    timeline = fg_game.waves.timeline
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, fg_game.seed),
+        STATE.pack(fg_game.frame, fg_game.score, fg_game.lives, fg_game.kills,
+                   fg_game.game_active, fg_game.game_over),
+        RNG.pack(version, gauss is not None, gauss or 0.0),
+        array('I', words).tobytes(),
+        COUNTS.pack(len(planes), len(enemies), len(bullets), len(powerups),
+                    len(trees), len(timeline)),
+    ]
+    parts += [PLANE.pack(plane.x, plane.y, plane.moving_right, plane.moving_left,
+                         plane.moving_up, plane.moving_down) for plane in planes]
+    parts += [ENEMY.pack(enemy.x, enemy.y, enemy.rect.x, enemy.rect.y, enemy.direction)
+              for enemy in enemies]
+    lanes = {plane: lane for lane, plane in enumerate(planes)}
+    parts += [BULLET.pack(bullet.x, bullet.rect.x, bullet.rect.y, lanes[bullet.plane])
+              for bullet in bullets]
+    parts += [POWERUP.pack(powerup.x, powerup.rect.x, powerup.rect.y,
+                           POWERUP_TYPES.index(powerup.powerup_type))
+              for powerup in powerups]
+    if trees:
+        images = fg_game.assets.folder(fg_game.settings.trees_folder)
+        paths = {path: i for i, path in enumerate(images)}
+        parts += [TREE.pack(tree.x, tree.rect.x, tree.rect.y, paths[tree.image_path])
+                  for tree in trees]
+
+    terrain = fg_game.terrain
+    if terrain:
+        parts.append(TERRAIN.pack(True, terrain.first, terrain.x, terrain.prev_x))
+    else:
+        parts.append(TERRAIN.pack(False, 0, 0.0, 0.0))
+
+    waves = fg_game.waves
+    last = getattr(waves.source, 'last', None)
+    last_index = next((i for i, (_, _, wave) in enumerate(timeline) if wave is last), NO_WAVE)
+    parts.append(TIMELINE.pack(waves.order, last_index))
+    for due, order, wave in timeline:
+        parts.append(WAVE.pack(due, order, wave.direction, len(wave.positions)))
+        parts += [POSITION.pack(x, y) for x, y in wave.positions]
+    return b''.join(parts)
+
+
+def restore(fg_game, data):
+    """Put the game back in the state captured in data.
+
+    Sprites already in play are reused and given the captured state,
+    and only the difference in numbers goes back to or comes from the
+    pools. The RNG state is set last, after any random choices made by
+    the sprites taken from the pools.
+
+    Raises ValueError, before touching the game, if data is not a whole
+    snapshot of a game with as many planes, or refers to a plane, power-up
+    type, tree image or wave that does not exist.
+    """
+    from waves import Wave
+
+    if len(data) < PREFIX_SIZE:
+        raise ValueError(f"snapshot is {len(data)} bytes, too short for its header")
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} world snapshot")
+    offset = HEADER.size
+    frame, score, lives, kills, game_active, game_over = STATE.unpack_from(data, offset)
+    offset += STATE.size
+    rng_version, has_gauss, gauss = RNG.unpack_from(data, offset)
+    offset += RNG.size
+    words = array('I')
+    words.frombytes(data[offset:offset + RNG_WORDS * 4])
+    offset += RNG_WORDS * 4
+    counts = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    plane_count, enemy_count, bullet_count, powerup_count, tree_count, wave_count = counts
+    if plane_count != len(fg_game.planes):
+        raise ValueError(f"snapshot has {plane_count} planes, the game {len(fg_game.planes)}")
+    expected = _size(data, offset, counts)
+    if len(data) != expected:
+        raise ValueError(f"snapshot is {len(data)} bytes, its counts need {expected}")
+
+    def records(layout, count):
+        nonlocal offset
+        end = offset + layout.size * count
+        values = list(layout.iter_unpack(data[offset:end]))
+        offset = end
+        return values
+
+    # Read and check everything first, so a bad snapshot changes nothing
+    planes = records(PLANE, plane_count)
+    enemies = records(ENEMY, enemy_count)
+    bullets = records(BULLET, bullet_count)
+    powerups = records(POWERUP, powerup_count)
+    trees = records(TREE, tree_count)
+    has_terrain, first, terrain_x, terrain_prev_x = TERRAIN.unpack_from(data, offset)
+    offset += TERRAIN.size
+    order, last_index = TIMELINE.unpack_from(data, offset)
+    offset += TIMELINE.size
+    waves = []
+    for _ in range(wave_count):
+        due, wave_order, direction, count = WAVE.unpack_from(data, offset)
+        offset += WAVE.size
+        waves.append((due, wave_order, direction, records(POSITION, count)))
+
+    if any(lane >= plane_count for _, _, _, lane in bullets):
+        raise ValueError("snapshot has a bullet fired by a plane it does not have")
+    if any(kind >= len(POWERUP_TYPES) for _, _, _, kind in powerups):
+        raise ValueError("snapshot has a power-up of an unknown type")
+    if trees:
+        images = len(fg_game.assets.folder(fg_game.settings.trees_folder))
+        if any(image >= images for _, _, _, image in trees):
+            raise ValueError(f"snapshot has a tree image past the {images} in the trees folder")
+    if last_index != NO_WAVE and last_index >= wave_count:
+        raise ValueError(f"snapshot's last wave is {last_index} of {wave_count}")
+    rng_state = (rng_version, tuple(words), gauss if has_gauss else None)
+    try:
+        random.Random().setstate(rng_state)
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"snapshot has a bad RNG state: {error}") from None
+
+    fg_game.seed = seed
+    fg_game.frame = frame
+    fg_game.score, fg_game.lives, fg_game.kills = score, lives, kills
+    fg_game.game_active, fg_game.game_over = game_active, game_over
+
+    for plane, (x, y, right, left, up, down) in zip(fg_game.planes, planes):
+        plane.x = plane.prev_x = x
+        plane.y = plane.prev_y = y
+        plane.rect.x = x
+        plane.rect.y = y
+        plane.moving_right, plane.moving_left = right, left
+        plane.moving_up, plane.moving_down = up, down
+
+    sprites = _sprites(fg_game.enemies, fg_game.enemy_pool, enemy_count, 1)
+    for enemy, (x, y, left, top, direction) in zip(sprites, enemies):
+        enemy.x, enemy.y = x, y
+        enemy.rect.topleft = (left, top)
+        enemy.direction = direction
+
+    sprites = _sprites(fg_game.bullets, fg_game.bullet_pool, bullet_count, fg_game.plane)
+    for bullet, (x, left, top, lane) in zip(sprites, bullets):
+        bullet.plane = fg_game.planes[lane]
+        bullet.x = x
+        bullet.rect.topleft = (left, top)
+
+    sprites = _sprites(fg_game.powerups, fg_game.powerup_pool, powerup_count, POWERUP_TYPES[0])
+    for powerup, (x, left, top, kind) in zip(sprites, powerups):
+        powerup.powerup_type = POWERUP_TYPES[kind]
+        powerup.x = x
+        powerup.rect.topleft = (left, top)
+
+    sprites = _sprites(fg_game.trees, fg_game.tree_pool, tree_count)
+    for tree, (x, left, top, image) in zip(sprites, trees):
+        tree.image_path = tree.images[image]
+        tree.image = tree.assets.image(tree.image_path, alpha=True)
+        tree.rect = tree.image.get_rect(topleft=(left, top))
+        tree.x = x
+
+    if fg_game.entity_store:
+        for group in (fg_game.enemies, fg_game.bullets, fg_game.powerups, fg_game.trees):
+            if group:
+                group.refresh()
+
+    terrain = fg_game.terrain
+    if terrain and has_terrain:
+        if terrain.seed != seed:
+            terrain.seed = seed
+            terrain.rebuild()
+        terrain.first, terrain.x, terrain.prev_x = first, terrain_x, terrain_prev_x
+
+    scheduler = fg_game.waves
+    for _, _, wave in scheduler.timeline:
+        fg_game.enemy_pool.release_all(wave.enemies)
+    scheduler.order = order
+    timeline = [(due, wave_order, Wave(due, positions, direction))
+                for due, wave_order, direction, positions in waves]
+    scheduler.timeline = timeline
+    if hasattr(scheduler.source, 'last'):
+        scheduler.source.last = timeline[last_index][2] if last_index != NO_WAVE else None
+
+    fg_game.random.setstate(rng_state)
+
+    fg_game.renderer.invalidate()
+
+
+def _size(data, offset, counts):
+    """Return the length a snapshot with counts should have, given the body starts at offset.
+
+    The waves' position lists vary in length, so their headers are read
+    as far as data goes; a truncated timeline gives a size past its end.
+    """
+    plane_count, enemy_count, bullet_count, powerup_count, tree_count, wave_count = counts
+    size = (offset + PLANE.size * plane_count + ENEMY.size * enemy_count
+            + BULLET.size * bullet_count + POWERUP.size * powerup_count
+            + TREE.size * tree_count + TERRAIN.size + TIMELINE.size)
+    for _ in range(wave_count):
+        if size + WAVE.size > len(data):
+            return size + WAVE.size
+        count = WAVE.unpack_from(data, size)[3]
+        size += WAVE.size + POSITION.size * count
+    return size
+
+
+def _sprites(group, pool, count, *args):
+    """Return count sprites of group in group order, reusing those in play.
+
+    Extra sprites go back to the pool and missing ones are acquired with
+    args; the caller then overwrites the state of every one.
+    """
+    sprites = group.sprites()
+    if len(sprites) > count:
+        extra = sprites[count:]
+        group.remove(*extra)
+        pool.release_all(extra)
+        del sprites[count:]
+    while len(sprites) < count:
+        sprite = pool.acquire(*args)
+        group.add(sprite)
+        sprites.append(sprite)
+    return sprites
+
+
+def save(path, data):
+    """Write a snapshot to path."""
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def load(path):
+    """Read a snapshot written by save()."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class SnapshotRing:
+    """A class to keep the snapshots of the most recent steps for rollback."""
+
+    def __init__(self, capacity):
+        """Keep at most capacity snapshots, dropping the oldest first."""
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def push(self, frame, data):
+        """Add the snapshot taken at step frame."""
+        self.snapshots.append((frame, data))
+
+    def get(self, frame):
+        """Return the snapshot taken at step frame, or None if it is gone."""
+        for taken, data in reversed(self.snapshots):
+            if taken == frame:
+                return data
+            if taken < frame:
+                break
+        return None
+
+    def rollback(self, fg_game, frame):
+        """Restore the snapshot of step frame, dropping every later one.
+
+        Returns False, leaving the game alone, if it is no longer kept.
+        """
+        data = self.get(frame)
+        if data is None:
+            return False
+        while self.snapshots[-1][0] > frame:
+            self.snapshots.pop()
+        restore(fg_game, data)
+        return True
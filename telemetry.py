@@ -0,0 +1,204 @@
+"""Session telemetry and the high-score leaderboard.
+
+The game only ever puts events on a bounded queue; a writer thread
+takes them off in batches, appends them to an append-only JSON-lines
+log and keeps every finished game's score in an SQLite leaderboard.
+When the queue is full the event is dropped and counted instead of
+making the game wait.
+
+    python telemetry.py             # show the leaderboard
+    python telemetry.py --top 20
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from time import perf_counter
+
+# Put on the queue to make the writer flush and stop
+STOP = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+"""
+
+
+class Telemetry:
+    """A class to record session events without ever blocking the game.
+
+    record() is safe to call from any thread. The writer thread is
+    started by start(), so events recorded before it are simply queued.
+    """
+
+    def __init__(self, fg_game):
+        """Create the queue for the game's settings; nothing is written yet."""
+        self.fg_game = fg_game
+        self.settings = fg_game.settings
+        self.queue = queue.Queue(maxsize=self.settings.telemetry_queue_size)
+        self.writer = None
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        # Set when the log or leaderboard cannot be opened; events are then ignored
+        self.disabled = False
+
+        # Frame times gathered between summaries
+        self.frames = 0
+        self.frame_total = 0.0
+        self.frame_max = 0.0
+        self.summary_due = perf_counter() + self.settings.telemetry_summary_interval
+
+    def start(self):
+        """Start the writer thread."""
+        self.writer = threading.Thread(target=self._write, name='telemetry', daemon=True)
+        self.writer.start()
+
+    def record(self, kind, **fields):
+        """Queue an event of the given kind, dropping it if the queue is full."""
+        if self.disabled:
+            return
+        fields['kind'] = kind
+        fields['time'] = time.time()
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def frame_time(self, seconds):
+        """Add a frame's time, recording a summary every telemetry_summary_interval."""
+        self.frames += 1
+        self.frame_total += seconds
+        if seconds > self.frame_max:
+            self.frame_max = seconds
+        now = perf_counter()
+        if now >= self.summary_due:
+            self.record('frames', step=self.fg_game.frame, frames=self.frames,
+                        mean_ms=self.frame_total / self.frames * 1000,
+                        max_ms=self.frame_max * 1000, dropped=self.dropped)
+            self.frames = 0
+            self.frame_total = self.frame_max = 0.0
+            self.summary_due = now + self.settings.telemetry_summary_interval
+
+    def close(self, timeout=2.0):
+        """Flush what is queued and stop the writer, waiting at most timeout seconds."""
+        if self.writer is None or not self.writer.is_alive():
+            return
+        try:
+            self.queue.put(STOP, timeout=timeout)
+        except queue.Full:
+            print(f"telemetry: writer still busy after {timeout}s, "
+                  f"{self.queue.qsize()} events not written")
+            return
+        self.writer.join(timeout)
+        if self.writer.is_alive():
+            print(f"telemetry: writer did not finish within {timeout}s")
+
+    def _write(self):
+        """Writer thread: append batches of events to the log and the leaderboard."""
+        import sqlite3
+
+        settings = self.settings
+        log = db = None
+        try:
+            log = open(settings.telemetry_log, 'a', encoding='utf-8')
+            db = sqlite3.connect(settings.leaderboard_db)
+            db.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as error:
+            # Nothing can be written, so stop taking events rather than queue them forever
+            print(f"telemetry: disabled, cannot open its files: {error}")
+            self.disabled = True
+            if log:
+                log.close()
+            if db:
+                db.close()
+            return
+        try:
+            while True:
+                batch = self._batch(settings.telemetry_batch, settings.telemetry_flush_interval)
+                stop = STOP in batch
+                events = [event for event in batch if event is not STOP]
+                try:
+                    self._flush(log, db, events)
+                except (OSError, sqlite3.Error) as error:
+                    # Losing telemetry must never take the game down
+                    if not self.errors:
+                        print(f"telemetry: write failed, events lost: {error}")
+                    self.errors += 1
+                if stop:
+                    return
+        finally:
+            log.close()
+            db.close()
+
+    def _batch(self, size, interval):
+        """Wait for an event, then gather up to size of them for at most interval seconds."""
+        batch = [self.queue.get()]
+        deadline = perf_counter() + interval
+        while len(batch) < size and batch[-1] is not STOP:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, log, db, events):
+        """Write events to the log and finished games to the leaderboard."""
+        if not events:
+            return
+        log.write(''.join(json.dumps(event) + '\n' for event in events))
+        log.flush()
+        scores = [(event['player'], event['score'], event['kills'], event['step'],
+                   event['seed'], event['time'])
+                  for event in events if event['kind'] == 'game_over']
+        if scores:
+            with db:
+                db.executemany('INSERT INTO scores (player, score, kills, steps, seed, played_at) '
+                               'VALUES (?, ?, ?, ?, ?, ?)', scores)
+        self.written += len(events)
+
+    def report(self):
+        """Return a short summary of the telemetry activity."""
+        return (f"telemetry: {self.written} written, {self.dropped} dropped, "
+                f"{self.errors} write errors")
+
+
+def top_scores(path, count=10):
+    """Return the count best (player, score, kills, played_at) rows of the leaderboard."""
+    import sqlite3
+
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(SCHEMA)
+        return db.execute('SELECT player, score, kills, played_at FROM scores '
+                          'ORDER BY score DESC, played_at LIMIT ?', (count,)).fetchall()
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    from settings import Settings
+
+    parser = argparse.ArgumentParser(description="Show the FighterGame leaderboard.")
+    parser.add_argument('--db', default=Settings().leaderboard_db)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+    for rank, (player, score, kills, played_at) in enumerate(top_scores(args.db, args.top), 1):
+        played = time.strftime('%Y-%m-%d %H:%M', time.localtime(played_at))
+        print(f"{rank:3}. {player:16} {score:8} ({kills} kills, {played})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Shared test setup: SDL's dummy driver and a game directory with stand-in images."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame  # noqa: E402
+
+
+@pytest.fixture
+def game_dir(tmp_path, monkeypatch):
+    """Run the test from a directory holding every image the game loads."""
+    pygame.display.init()
+    images = tmp_path / 'images'
+    trees = images / 'trees'
+    trees.mkdir(parents=True)
+    for name, size, colour in (('fighter.bmp', (60, 40), (200, 200, 255)),
+                               ('enemy1.bmp', (50, 36), (255, 80, 80))):
+        surface = pygame.Surface(size)
+        surface.fill(colour)
+        pygame.image.save(surface, str(images / name))
+    for number, width in enumerate((30, 35, 40)):
+        surface = pygame.Surface((width, 50), pygame.SRCALPHA)
+        pygame.draw.ellipse(surface, (30, 120, 30), surface.get_rect())
+        pygame.image.save(surface, str(trees / f'tree{number}.png'))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
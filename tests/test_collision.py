@@ -0,0 +1,66 @@
+import random
+import types
+
+import pygame
+import pytest
+
+import entities
+from collision import Collisions
+from settings import Settings
+
+
+class Box(pygame.sprite.Sprite):
+    """A bare sprite with the position attributes the entity store mirrors."""
+
+    def __init__(self, label, rect):
+        super().__init__()
+        self.label = label
+        self.rect = pygame.Rect(rect)
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
+        self.direction = 1
+
+
+def _layout(seed, count):
+    """Return count random (x, y, width, height) rects, some off screen."""
+    rng = random.Random(seed)
+    return [(rng.randint(-40, 800), rng.randint(-40, 600), rng.randint(2, 60), rng.randint(2, 60))
+            for _ in range(count)]
+
+
+def _group(kind, rects, prefix):
+    group = entities.EntityGroup() if kind == 'entity' else pygame.sprite.Group()
+    group.add(*[Box(f'{prefix}{i}', rect) for i, rect in enumerate(rects)])
+    return group
+
+
+def _labels(result):
+    return [(sprite.label, [other.label for other in hits]) for sprite, hits in result.items()]
+
+
+@pytest.mark.parametrize('kind', ['entity', 'sprite'])
+@pytest.mark.parametrize('dokilla', [False, True])
+@pytest.mark.parametrize('dokillb', [False, True])
+@pytest.mark.parametrize('grid_min', [0, 32])
+def test_groupcollide_matches_pygame(kind, dokilla, dokillb, grid_min):
+    if kind == 'entity' and not entities.available():
+        pytest.skip("NumPy is not installed")
+    settings = Settings()
+    settings.collision_grid_min = grid_min
+    collisions = Collisions(types.SimpleNamespace(settings=settings))
+
+    hits = 0
+    for seed in range(20):
+        rects_a, rects_b = _layout(seed, 40), _layout(seed + 1000, 60)
+        ours_a, ours_b = _group(kind, rects_a, 'a'), _group(kind, rects_b, 'b')
+        theirs_a, theirs_b = _group(kind, rects_a, 'a'), _group(kind, rects_b, 'b')
+
+        collisions.enemies.rebuild(ours_b)
+        ours = collisions.groupcollide(ours_a, ours_b, collisions.enemies, dokilla, dokillb)
+        theirs = pygame.sprite.groupcollide(theirs_a, theirs_b, dokilla, dokillb)
+
+        assert _labels(ours) == _labels(theirs)
+        assert [s.label for s in ours_a] == [s.label for s in theirs_a]
+        assert [s.label for s in ours_b] == [s.label for s in theirs_b]
+        hits += len(theirs)
+    assert hits, "the layouts should overlap somewhere"
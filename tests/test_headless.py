@@ -0,0 +1,26 @@
+import pygame
+
+from fighter_game import FighterGame
+from headless import ScriptedInput, key_event
+
+
+def test_scripted_input_drives_a_headless_game(game_dir):
+    script = ScriptedInput([(10, key_event(pygame.KEYDOWN, pygame.K_SPACE))])
+    script.press(20, pygame.K_d, hold=30)
+    fg_game = FighterGame(headless=True, seed=3)
+    start = fg_game.plane.rect.x
+
+    fg_game.run_headless(max_frames=20, script=script, until_game_over=False)
+    assert len(fg_game.bullets) == 1
+    assert fg_game.plane.rect.x == start
+
+    fg_game.run_headless(max_frames=50, script=script, until_game_over=False)
+    assert fg_game.plane.moving_right
+    assert fg_game.plane.rect.x > start
+
+    # Released on frame 50, so the plane stays where it stopped
+    fg_game.run_headless(max_frames=51, script=script, until_game_over=False)
+    assert not fg_game.plane.moving_right
+    moved = fg_game.plane.rect.x
+    fg_game.run_headless(max_frames=80, script=script, until_game_over=False)
+    assert fg_game.plane.rect.x == moved
@@ -0,0 +1,159 @@
+import socket
+import struct
+
+import pytest
+
+import net
+from settings import Settings
+
+BASE = {
+    0: (net.PLANE, 10, 300),
+    4: (net.ENEMY, 700, 120),
+    7: (net.BULLET, 80, 310),
+    9: (net.POWERUP, 400, 50),
+    12: (net.ENEMY, 650, 200),
+}
+# Bullet 7 removed, bullet 15 spawned, the plane, power-up and enemy 12 moved
+WORLD = {
+    0: (net.PLANE, 14, 296),
+    4: (net.ENEMY, 700, 120),
+    9: (net.POWERUP, 395, 50),
+    12: (net.ENEMY, -3, 210),
+    15: (net.BULLET, 90, 290),
+}
+
+
+def test_delta_snapshot_round_trip():
+    packet = net.encode_snapshot(40, 37, 12, 150, 2, net.GAME_OVER, WORLD, BASE)
+    assert net.decode_snapshot(bytes(packet), {37: BASE}) == (40, 12, 150, 2, net.GAME_OVER, WORLD)
+
+
+def test_full_snapshot_round_trip():
+    packet = net.encode_snapshot(40, 0, 0, 0, 3, 0, WORLD, {})
+    assert net.decode_snapshot(bytes(packet), {}) == (40, 0, 0, 3, 0, WORLD)
+
+
+def test_snapshot_against_unknown_base_is_skipped():
+    packet = net.encode_snapshot(40, 37, 12, 150, 2, 0, WORLD, BASE)
+    assert net.decode_snapshot(bytes(packet), {36: BASE}) is None
+
+
+def test_truncated_snapshot_raises():
+    packet = bytes(net.encode_snapshot(40, 37, 12, 150, 2, 0, WORLD, BASE))
+    for end in (0, 5, net.SNAPSHOT_HEADER.size + 2, len(packet) - 1):
+        with pytest.raises((IndexError, KeyError, struct.error)):
+            net.decode_snapshot(packet[:end], {37: BASE})
+
+
+def test_server_drops_malformed_packets(game_dir):
+    server = net.GameServer()
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.settimeout(2.0)
+    client.connect(server.address)
+    try:
+        garbage = (b'', bytes([net.HELLO]), bytes([net.HELLO, 0, 0]), bytes([net.INPUT, 0]),
+                   net.HELLO_PACKET.pack(net.HELLO, 0) + b'\x00', b'\xffjunk')
+        for packet in garbage:
+            client.send(packet)
+        server.poll()
+        assert server.bad_packets == len(garbage)
+        assert not server.sessions
+
+        client.send(net.HELLO_PACKET.pack(net.HELLO, 3))
+        server.poll()
+        kind, session, player, _ = net.WELCOME_PACKET.unpack(client.recv(net.MAX_PACKET))
+        assert (kind, session, player) == (net.WELCOME, 3, 0)
+    finally:
+        client.close()
+        server.sock.close()
+
+
+def test_recycled_bullets_get_new_ids(game_dir):
+    session = net.Session(0, 1, Settings())
+    address = ('127.0.0.1', 9)
+    session.join(address)
+    seen = {}
+    for step in range(600):
+        session.apply_input(address, step + 1, 0, 0, step // 2 % 256)
+        session.fg_game._update_game()
+        if step % session.fg_game.settings.net_snapshot_interval:
+            continue
+        for net_id, (kind, x, _) in session._capture().items():
+            if kind == net.BULLET:
+                # Bullets only fly right, so an id never goes back
+                assert x >= seen.get(net_id, x)
+                seen[net_id] = x
+    assert len(seen) > session.fg_game.settings.bullets_allowed
+
+
+def test_departed_player_leaves_play(game_dir):
+    session = net.Session(0, 1, Settings())
+    first, second = ('127.0.0.1', 9), ('127.0.0.1', 10)
+    session.join(first)
+    session.join(second)
+    assert session.fg_game.planes == session.planes
+    session.apply_input(second, 1, 0, net.UP, 0)
+
+    session.leave(second)
+    assert session.fg_game.planes == session.planes[:1]
+    assert not session.planes[1].moving_up
+    planes = {net_id for net_id, (kind, _, _) in session._capture().items() if kind == net.PLANE}
+    assert planes == {0}
+
+
+def test_client_sees_game_over_before_restart(game_dir):
+    settings = Settings()
+    settings.net_game_over_delay = 0.1
+    server = net.GameServer(settings=settings)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.settimeout(2.0)
+    client.connect(server.address)
+    try:
+        client.send(net.HELLO_PACKET.pack(net.HELLO, 0))
+        server.poll()
+        client.recv(net.MAX_PACKET)
+        fg_game = server.sessions[0].fg_game
+        fg_game._game_over()
+
+        flags = []
+        for _ in range(60):
+            server.tick()
+            if server.ticks % settings.net_snapshot_interval == 1:
+                decoded = net.decode_snapshot(client.recv(net.MAX_PACKET), {})
+                flags.append(decoded[4])
+        assert flags[0] == net.GAME_OVER
+        assert flags[-1] == 0
+        assert not fg_game.game_over
+    finally:
+        client.close()
+        server.sock.close()
+
+
+def test_server_refuses_sessions_past_its_limit(game_dir):
+    settings = Settings()
+    settings.net_max_sessions = 1
+    server = net.GameServer(settings=settings)
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.settimeout(2.0)
+    client.connect(server.address)
+    try:
+        for session_id, expected in ((1, 0), (2, net.FULL)):
+            client.send(net.HELLO_PACKET.pack(net.HELLO, session_id))
+            server.poll()
+            _, session, player, _ = net.WELCOME_PACKET.unpack(client.recv(net.MAX_PACKET))
+            assert (session, player) == (session_id, expected)
+        assert list(server.sessions) == [1]
+        assert server.refused == 1
+
+        # Once its player has gone quiet the session is closed, making room
+        for player in server.sessions[1].players.values():
+            player.last_heard -= settings.net_timeout + 1
+        server.tick()
+        assert not server.sessions
+        client.send(net.HELLO_PACKET.pack(net.HELLO, 2))
+        server.poll()
+        _, session, player, _ = net.WELCOME_PACKET.unpack(client.recv(net.MAX_PACKET))
+        assert (session, player) == (2, 0)
+    finally:
+        client.close()
+        server.sock.close()
@@ -0,0 +1,68 @@
+import json
+
+import pygame
+import pytest
+
+import replay
+from fighter_game import FighterGame
+from settings import Settings
+
+
+def _keys(fg_game):
+    """Fire every few steps and weave up and down."""
+    frame = fg_game.frame
+    events = []
+    if frame % 6 == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    if frame % 80 == 0:
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_w))
+    if frame % 80 == 40:
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_w))
+        events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_s))
+    if frame % 80 == 79:
+        events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_s))
+    return events
+
+
+def test_recording_replays_to_the_same_result(game_dir):
+    path = str(game_dir / 'game.fgr')
+    fg_game = FighterGame(headless=True, seed=5)
+    fg_game.start_recording(path)
+    fg_game.run_headless(max_frames=1500, script=_keys, until_game_over=False)
+    fg_game.recorder.save(path, fg_game)
+    assert fg_game.score > 0
+
+    recording = replay.Recording.load(path)
+    replayed = replay.verify(recording)
+    assert (replayed.frame, replayed.score, replayed.lives) == (
+        fg_game.frame, fg_game.score, fg_game.lives)
+
+    recording.score += 10
+    with pytest.raises(replay.ReplayMismatch):
+        replay.verify(recording)
+
+
+@pytest.mark.parametrize('terrain, waves', [(False, None), (True, 'waves.json')])
+def test_recording_keeps_the_settings_it_was_played_with(game_dir, terrain, waves):
+    settings = Settings()
+    settings.terrain = terrain
+    if waves:
+        (game_dir / waves).write_text(json.dumps({'loop': 3000, 'waves': [
+            {'at': 0, 'formation': 'row', 'count': 4, 'top': 400},
+            {'at': 1500, 'formation': 'v', 'count': 7, 'direction': -1},
+        ]}))
+        settings.wave_file = waves
+    path = str(game_dir / 'game.fgr')
+    fg_game = FighterGame(headless=True, seed=5, settings=settings)
+    fg_game.start_recording(path)
+    fg_game.run_headless(max_frames=1500, script=_keys, until_game_over=False)
+    fg_game.recorder.save(path, fg_game)
+
+    if waves:
+        # The script is kept in the recording, not read again from its file
+        (game_dir / waves).unlink()
+    recording = replay.Recording.load(path)
+    assert (recording.terrain, recording.waves is not None) == (terrain, bool(waves))
+    replayed = replay.verify(recording)
+    assert (replayed.frame, replayed.score, replayed.lives) == (
+        fg_game.frame, fg_game.score, fg_game.lives)
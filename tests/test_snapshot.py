@@ -0,0 +1,157 @@
+import pytest
+
+import snapshot
+from fighter_game import FighterGame
+from settings import Settings
+
+
+def _settings(entity_store, terrain):
+    settings = Settings()
+    settings.entity_store = entity_store
+    settings.terrain = terrain
+    return settings
+
+
+def _play(fg_game, steps):
+    """Step the game with inputs that depend only on the step number."""
+    for _ in range(steps):
+        frame = fg_game.frame
+        fg_game.plane.moving_up = frame // 50 % 2 == 0
+        fg_game.plane.moving_down = not fg_game.plane.moving_up
+        if frame % 4 == 0:
+            fg_game._fire_bullets()
+        fg_game._update_game()
+
+
+@pytest.mark.parametrize('entity_store', [False, True])
+@pytest.mark.parametrize('terrain', [False, True])
+def test_restored_game_continues_identically(game_dir, entity_store, terrain):
+    original = FighterGame(headless=True, seed=11, settings=_settings(entity_store, terrain))
+    _play(original, 600)
+    data = snapshot.capture(original)
+
+    restored = FighterGame(headless=True, seed=99, settings=_settings(entity_store, terrain))
+    _play(restored, 150)
+    snapshot.restore(restored, data)
+    assert snapshot.capture(restored) == data
+
+    _play(original, 600)
+    _play(restored, 600)
+    assert original.score > 0
+    assert snapshot.capture(restored) == snapshot.capture(original)
+
+
+def test_bad_snapshot_leaves_game_untouched(game_dir):
+    source = FighterGame(headless=True, seed=11)
+    _play(source, 300)
+    data = snapshot.capture(source)
+
+    fg_game = FighterGame(headless=True, seed=12)
+    _play(fg_game, 100)
+    before = snapshot.capture(fg_game)
+    for bad in (data[:10], data[:-5], data + b'\0'):
+        with pytest.raises(ValueError):
+            snapshot.restore(fg_game, bad)
+        assert snapshot.capture(fg_game) == before
+
+    fg_game.add_plane()
+    with pytest.raises(ValueError):
+        snapshot.restore(fg_game, data)
+
+
+def test_quick_load_rejects_damaged_file(game_dir):
+    fg_game = FighterGame(headless=True, seed=11)
+    _play(fg_game, 200)
+    fg_game.quick_save()
+    with open(fg_game.settings.quicksave_path, 'r+b') as f:
+        f.truncate(len(snapshot.capture(fg_game)) - 3)
+    _play(fg_game, 50)
+    before = snapshot.capture(fg_game)
+    assert not fg_game.quick_load()
+    assert snapshot.capture(fg_game) == before
+
+
+def _corrupt(data, layout, index, field, value):
+    """Return data with field of record index of a section set to value."""
+    offsets = {}
+    counts = snapshot.COUNTS.unpack_from(data, snapshot.PREFIX_SIZE - snapshot.COUNTS.size)
+    offset = snapshot.PREFIX_SIZE
+    for section, count in zip((snapshot.PLANE, snapshot.ENEMY, snapshot.BULLET,
+                               snapshot.POWERUP, snapshot.TREE), counts):
+        offsets[section] = offset
+        offset += section.size * count
+    offsets[snapshot.TIMELINE] = offset + snapshot.TERRAIN.size
+    start = offsets[layout] + layout.size * index
+    values = list(layout.unpack_from(data, start))
+    values[field] = value
+    return data[:start] + layout.pack(*values) + data[start + layout.size:]
+
+
+@pytest.mark.parametrize('layout, field, value', [
+    (snapshot.BULLET, 3, 1),
+    (snapshot.POWERUP, 3, 200),
+    (snapshot.TREE, 3, 0xFFFF),
+    (snapshot.TIMELINE, 1, 50),
+])
+def test_bad_index_leaves_game_untouched(game_dir, layout, field, value):
+    source = FighterGame(headless=True, seed=11, settings=_settings(False, False))
+    _play(source, 300)
+    source._fire_bullets()
+    source._maybe_drop_powerup(source.plane)
+    data = snapshot.capture(source)
+    bad = _corrupt(data, layout, 0, field, value)
+
+    fg_game = FighterGame(headless=True, seed=12, settings=_settings(False, False))
+    _play(fg_game, 50)
+    before = snapshot.capture(fg_game)
+    with pytest.raises(ValueError):
+        snapshot.restore(fg_game, bad)
+    assert snapshot.capture(fg_game) == before
+
+
+@pytest.mark.parametrize('offset, value', [
+    (0, 99),
+    (snapshot.RNG.size + (snapshot.RNG_WORDS - 1) * 4, 0xFFFF),
+])
+def test_bad_rng_state_leaves_game_untouched(game_dir, offset, value):
+    source = FighterGame(headless=True, seed=11)
+    _play(source, 100)
+    data = bytearray(snapshot.capture(source))
+    start = snapshot.HEADER.size + snapshot.STATE.size + offset
+    data[start:start + 4] = value.to_bytes(4, 'little')
+
+    fg_game = FighterGame(headless=True, seed=12)
+    _play(fg_game, 50)
+    before = snapshot.capture(fg_game)
+    with pytest.raises(ValueError):
+        snapshot.restore(fg_game, bytes(data))
+    assert snapshot.capture(fg_game) == before
+
+
+def test_quick_load_rejects_bad_tree_image(game_dir):
+    fg_game = FighterGame(headless=True, seed=11, settings=_settings(False, False))
+    _play(fg_game, 50)
+    fg_game.quick_save()
+    with open(fg_game.settings.quicksave_path, 'rb') as f:
+        data = f.read()
+    with open(fg_game.settings.quicksave_path, 'wb') as f:
+        f.write(_corrupt(data, snapshot.TREE, 0, 3, 0xFFFF))
+    _play(fg_game, 250)
+    before = snapshot.capture(fg_game)
+    assert not fg_game.quick_load()
+    assert snapshot.capture(fg_game) == before
+
+
+def test_quick_save_and_load_report_file_errors(game_dir, capsys):
+    fg_game = FighterGame(headless=True, seed=11)
+    _play(fg_game, 50)
+    fg_game.settings.quicksave_path = str(game_dir / 'missing' / 'quicksave.bin')
+    assert not fg_game.quick_save()
+    assert "Quick-save failed" in capsys.readouterr().out
+
+    # A directory exists but cannot be read as a file
+    fg_game.settings.quicksave_path = str(game_dir)
+    before = snapshot.capture(fg_game)
+    assert not fg_game.quick_load()
+    assert "Quick-load failed" in capsys.readouterr().out
+    assert snapshot.capture(fg_game) == before
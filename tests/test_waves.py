@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from fighter_game import FighterGame
+from settings import Settings
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'data', 'sample_waves.json')
+
+
+def _game(wave_file):
+    settings = Settings()
+    settings.wave_file = str(wave_file)
+    return FighterGame(headless=True, seed=5, settings=settings)
+
+
+def test_sample_file_parses(game_dir):
+    fg_game = _game(SAMPLE)
+    with open(SAMPLE) as f:
+        script = json.load(f)
+    source = fg_game.waves.source
+    assert source.loop == script['loop']
+    assert [entry['at'] for entry in source.entries] == sorted(w['at'] for w in script['waves'])
+    waves = source.start(0)
+    assert all(wave.positions for wave in waves)
+    assert {wave.direction for wave in waves} == {1, -1}
+
+
+@pytest.mark.parametrize('script', [
+    '{"waves": [{"at": 0}',
+    '[]',
+    '{"waves": []}',
+    '{"waves": [{"formation": "row"}]}',
+    '{"waves": [{"at": -5}]}',
+    '{"waves": [{"at": 0, "formation": "circle"}]}',
+    '{"waves": [{"at": 0, "count": 0}]}',
+    '{"waves": [{"at": 0, "direction": 2}]}',
+    '{"waves": [{"at": 0, "top": "high"}]}',
+    '{"waves": [{"at": 0}], "loop": 0}',
+])
+def test_malformed_wave_file_is_rejected(game_dir, script):
+    path = game_dir / 'waves.json'
+    path.write_text(script)
+    with pytest.raises(ValueError):
+        _game(path)
+
+
+def test_waves_spawn_on_schedule(game_dir):
+    path = game_dir / 'waves.json'
+    path.write_text(json.dumps({'loop': 5000, 'waves': [
+        {'at': 2000, 'formation': 'row', 'count': 3},
+        {'at': 0, 'formation': 'column', 'count': 4},
+        {'at': 1000, 'formation': 'v', 'count': 5, 'direction': -1},
+    ]}))
+    fg_game = _game(path)
+    waves = fg_game.waves
+
+    # The wave at 0 spawned with the game, then the rest in time order,
+    # and the script starts over loop milliseconds after it began
+    spawns = {0: len(fg_game.enemies)}
+    for now in range(1, 11001):
+        spawned = waves.update(now)
+        if spawned:
+            spawns[now] = spawned
+    assert spawns == {0: 4, 1000: 5, 2000: 3, 5000: 4, 6000: 5, 7000: 3,
+                      10000: 4, 11000: 5}
+
+
+def test_prepared_waves_spawn_the_same(game_dir):
+    built = _game(SAMPLE)
+    lazy = _game(SAMPLE)
+    for _ in range(3000):
+        built.waves.prepare(float('inf'))
+        built._update_game()
+        lazy._update_game()
+    assert built.waves.prebuilt > 0
+    assert [enemy.rect.topleft for enemy in built.enemies] == \
+        [enemy.rect.topleft for enemy in lazy.enemies]
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class DigitAtlas:
+    """A class to compose numbers from pre-rendered digit glyphs.
+
+    Each character of the atlas is rendered once; a number is drawn by
+    blitting its glyphs side by side instead of re-rendering the string.
+    """
+
+    def __init__(self, font, color, background=None, chars='0123456789-'):
+        """Render every glyph in chars with the given colours."""
+        self.color = color
+        self.background = background
+        self.glyphs = {char: font.render(char, True, color, background) for char in chars}
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def compose(self, number, prefix=None):
+        """Return a new surface showing number, after the prefix surface if given."""
+        glyphs = [self.glyphs[char] for char in str(number)]
+        width = sum(glyph.get_width() for glyph in glyphs)
+        height = self.height
+        x = 0
+        if prefix is not None:
+            x = prefix.get_width()
+            width += x
+            height = max(height, prefix.get_height())
+
+        if self.background is None:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        else:
+            surface = pygame.Surface((width, height))
+            surface.fill(self.background)
+        if prefix is not None:
+            surface.blit(prefix, (0, 0))
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return surface
+
+
+class TextCache:
+    """A class to share fonts and rendered text across the game.
+
+    Fonts come from the game's AssetCache. Rendered strings are kept in a
+    bounded least-recently-used cache, so text that does not change is
+    rendered once and then only blitted.
+    """
+
+    def __init__(self, fg_game):
+        """Initialize an empty cache of Settings.text_cache_size entries."""
+        self.assets = fg_game.assets
+        self.limit = fg_game.settings.text_cache_size
+        self.rendered = OrderedDict()
+        self.masks = {}
+        self.atlases = {}
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size, name=None):
+        """Return the shared font of the given size."""
+        return self.assets.font(name, size)
+
+    def render(self, text, size, color, background=None, name=None):
+        """Return the rendered surface for text, rendering it only on a miss."""
+        key = (name, size, text, color, background)
+        surface = self.rendered.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.rendered.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.font(size, name).render(text, True, color, background)
+        self.rendered[key] = surface
+        if len(self.rendered) > self.limit:
+            self.rendered.popitem(last=False)
+        return surface
+
+    def mask(self, text, size, color, background=None, name=None):
+        """Return the collision mask of the rendered text, built only once."""
+        key = (name, size, text, color, background)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.render(text, size, color, background, name))
+            self.masks[key] = mask
+        return mask
+
+    def number(self, number, size, color, background=None, prefix='', name=None):
+        """Return a new surface showing prefix followed by number.
+
+        The prefix comes from the string cache and the digits from a
+        shared atlas, so a changing number is never fully re-rendered.
+        """
+        key = (name, size, color, background)
+        atlas = self.atlases.get(key)
+        if atlas is None:
+            atlas = DigitAtlas(self.font(size, name), color, background)
+            self.atlases[key] = atlas
+        prefix_image = self.render(prefix, size, color, background, name) if prefix else None
+        return atlas.compose(number, prefix_image)
+
+    def report(self):
+        """Return a short summary of the cache activity."""
+        return (f"text: {len(self.rendered)} cached, {len(self.atlases)} atlases, "
+                f"{self.hits} hits, {self.misses} misses")
@@ -0,0 +1,236 @@
+"""Enemy waves, scheduled on a timeline and built ahead of their spawn time.
+
+A wave source decides what spawns and when. RandomWaves is the game's
+original random fleet: 5 to 12 enemies in a column, a new fleet every
+fleet_spawn_min to fleet_spawn_max milliseconds. WaveFile reads scripted
+waves from a JSON file set as Settings.wave_file:
+
+    {"loop": 20000,
+     "waves": [{"at": 0, "formation": "column", "count": 8, "direction": 1},
+               {"at": 4000, "formation": "v", "count": 7, "direction": -1},
+               {"at": 9000, "formation": "row", "count": 5, "top": 300}]}
+
+"at" is in milliseconds from the start of the script, which restarts
+"loop" milliseconds after it began (omit "loop" to play it once). Each
+wave takes a formation of "column", "row" or "v", a count, a vertical
+direction of 1 (up) or -1 (down), and optionally "top" and "spacing".
+data/sample_waves.json is an example; play it with
+
+    python fighter_game.py --waves data/sample_waves.json
+"""
+import heapq
+import json
+from time import perf_counter
+
+FORMATIONS = ('column', 'row', 'v')
+
+
+class Wave:
+    """A class to hold one planned fleet and the enemies built for it so far."""
+
+    __slots__ = ('due', 'positions', 'direction', 'enemies')
+
+    def __init__(self, due, positions, direction):
+        """Plan a wave of enemies at positions, due at the given tick."""
+        self.due = due
+        self.positions = positions
+        self.direction = direction
+        self.enemies = []
+
+    def built(self):
+        """Return True once every enemy of the wave exists."""
+        return len(self.enemies) == len(self.positions)
+
+
+def formation(settings, enemy_size, shape, count, top=None, spacing=1.5):
+    """Return the starting positions of count enemies flying in shape.
+
+    Every formation starts at the right edge of the screen and enemies
+    that would start off the bottom are dropped.
+    """
+    if shape not in FORMATIONS:
+        raise ValueError(f"unknown formation {shape!r}")
+    width, height = enemy_size
+    right = settings.screen_width - width
+    bottom = settings.screen_height - height
+    positions = []
+
+    if shape == 'column':
+        y = height if top is None else top
+        for _ in range(count):
+            positions.append((right, y))
+            y += spacing * height
+            if y > bottom:
+                break
+    elif shape == 'row':
+        y = bottom // 2 if top is None else top
+        positions = [(right - i * spacing * width, y) for i in range(count)]
+    else:
+        # The point of the V leads and the arms trail behind it
+        y = bottom // 2 if top is None else top
+        for i in range(count):
+            rank = (i + 1) // 2
+            side = -1 if i % 2 else 1
+            positions.append((right - (count // 2 - rank) * spacing * width,
+                              y + side * rank * spacing * height))
+    return [(x, y) for x, y in positions if x >= 0 and 0 <= y <= bottom]
+
+
+class RandomWaves:
+    """A wave source that spawns the game's original random fleets."""
+
+    def __init__(self, fg_game):
+        """Initialize the source for the game's settings and enemy size."""
+        self.settings = fg_game.settings
+        self.random = fg_game.random
+        self.enemy_size = fg_game.assets.image(self.settings.enemy_image).get_size()
+
+    def start(self, now):
+        """Return the waves to schedule when play (re)starts at tick now."""
+        return [self._plan(now)]
+
+    def after(self, wave, now):
+        """Return the waves to schedule once wave has spawned at tick now."""
+        interval = self.random.randint(self.settings.fleet_spawn_min, self.settings.fleet_spawn_max)
+        return [self._plan(now + interval)]
+
+    def _plan(self, due):
+        """Plan a random fleet due at the given tick."""
+        count = self.random.randint(5, 12)  # Random number of enemies
+        direction = self.random.choice([-1, 1])  # Randomize initial direction
+        return Wave(due, formation(self.settings, self.enemy_size, 'column', count), direction)
+
+
+class WaveFile:
+    """A wave source that plays the scripted waves of a definition file."""
+
+    def __init__(self, fg_game, path):
+        """Read and check the waves defined in path."""
+        self.settings = fg_game.settings
+        self.enemy_size = fg_game.assets.image(self.settings.enemy_image).get_size()
+        with open(path) as f:
+            script = json.load(f)
+        if not isinstance(script, dict) or not script.get('waves'):
+            raise ValueError(f"{path} defines no waves")
+        self.loop = script.get('loop')
+        if self.loop is not None and not _whole(self.loop, 1):
+            raise ValueError(f"{path}: loop must be a positive number of milliseconds")
+        for number, entry in enumerate(script['waves'], 1):
+            problem = _check(entry)
+            if problem:
+                raise ValueError(f"{path}: wave {number} {problem}")
+        self.entries = sorted(script['waves'], key=lambda entry: entry['at'])
+        self.last = None
+
+    def start(self, now):
+        """Return every wave of the script, starting at tick now."""
+        waves = [self._plan(now, entry) for entry in self.entries]
+        self.last = waves[-1]
+        return waves
+
+    def after(self, wave, now):
+        """Return the next pass of the script once its last wave has spawned."""
+        if wave is not self.last or not self.loop:
+            return []
+        return self.start(wave.due - self.entries[-1]['at'] + self.loop)
+
+    def _plan(self, start, entry):
+        """Plan the wave described by entry for a script started at start."""
+        positions = formation(self.settings, self.enemy_size, entry.get('formation', 'column'),
+                              entry.get('count', 1), entry.get('top'), entry.get('spacing', 1.5))
+        return Wave(start + entry['at'], positions, entry.get('direction', 1))
+
+
+def _whole(value, least):
+    """Return True if value is an integer (not a bool) of at least least."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= least
+
+
+def _check(entry):
+    """Return what is wrong with a wave definition, or None if it is usable."""
+    if not isinstance(entry, dict):
+        return "is not an object"
+    if not _whole(entry.get('at'), 0):
+        return "needs \"at\", a time in milliseconds from 0"
+    if entry.get('formation', 'column') not in FORMATIONS:
+        return f"has unknown formation {entry['formation']!r}"
+    if not _whole(entry.get('count', 1), 1):
+        return "needs a count of at least 1"
+    if entry.get('direction', 1) not in (1, -1):
+        return "needs a direction of 1 or -1"
+    for key in ('top', 'spacing'):
+        value = entry.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f"needs a number for {key!r}"
+    return None
+
+
+class WaveScheduler:
+    """A class to spawn waves from a priority-queue timeline.
+
+    Waves are planned, including every random choice, on the simulation
+    step the previous one spawns, so play stays deterministic. Their
+    enemies are taken from the pool ahead of time by prepare(), called
+    with whatever frame time is left over, so spawning a wave is only an
+    insert into the enemies group.
+    """
+
+    def __init__(self, fg_game):
+        """Create the scheduler with the wave source named in the settings."""
+        self.fg_game = fg_game
+        self.settings = fg_game.settings
+        if self.settings.wave_file:
+            self.source = WaveFile(fg_game, self.settings.wave_file)
+        else:
+            self.source = RandomWaves(fg_game)
+        self.timeline = []
+        self.order = 0
+        self.prebuilt = 0
+
+    def restart(self, now):
+        """Drop every pending wave and start the source again at tick now.
+
+        Returns the enemies spawned right away.
+        """
+        for _, _, wave in self.timeline:
+            self.fg_game.enemy_pool.release_all(wave.enemies)
+        self.timeline = []
+        self._schedule(self.source.start(now))
+        return self.update(now)
+
+    def _schedule(self, waves):
+        """Put waves on the timeline."""
+        for wave in waves:
+            heapq.heappush(self.timeline, (wave.due, self.order, wave))
+            self.order += 1
+
+    def update(self, now):
+        """Spawn every wave that is due at tick now; return the enemies spawned."""
+        spawned = 0
+        while self.timeline and self.timeline[0][0] <= now:
+            _, _, wave = heapq.heappop(self.timeline)
+            while not wave.built():
+                self._build_enemy(wave)
+            self.fg_game.enemies.add(*wave.enemies)
+            spawned += len(wave.enemies)
+            self._schedule(self.source.after(wave, now))
+        return spawned
+
+    def prepare(self, deadline):
+        """Build enemies for the next waves until perf_counter() reaches deadline."""
+        for _, _, wave in heapq.nsmallest(self.settings.wave_lookahead, self.timeline):
+            while not wave.built():
+                if perf_counter() >= deadline:
+                    return
+                self._build_enemy(wave)
+                self.prebuilt += 1
+
+    def _build_enemy(self, wave):
+        """Take the wave's next enemy from the pool and put it in place."""
+        x, y = wave.positions[len(wave.enemies)]
+        enemy = self.fg_game.enemy_pool.acquire(wave.direction)
+        enemy.x = x
+        enemy.y = y
+        enemy.rect.x = x
+        enemy.rect.y = y
+        wave.enemies.append(enemy)